@@ -43,18 +43,18 @@ sns.set_context("poster")
 # ### 1a. Load the data
 # The dataset contains information on marketing newsletters/e-mail campaigns (e-mail offers sent to customers) and transaction level data from customers. The transactional data shows which offer customers responded to, and what the customer ended up buying. The data is presented as an Excel workbook containing two worksheets. Each worksheet contains a different dataset.
 # %% codecell
+from segmentation.ingest import load_workbook
+
 cd_data = 'data/'
-df_offers = pd.read_excel(cd_data+"/WineKMC.xlsx", sheet_name=0)
+# Both sheets are parsed once and cached as Parquet, keyed by file hash/mtime.
+df_offers, df_transactions = load_workbook(cd_data+"/WineKMC.xlsx")
 # %% markdown
 # ### 1b. Explore the data
 # %% codecell
-df_offers.columns = ["offer_id", "campaign", "varietal", "min_qty", "discount", "origin", "past_peak"]
 df_offers.head()
 # %% markdown
 # We see that the first dataset contains information about each offer such as the month it is in effect and several attributes about the wine that the offer refers to: the variety, minimum quantity, discount, country of origin and whether or not it is past peak. The second dataset in the second worksheet contains transactional data -- which offer each customer responded to.
 # %% codecell
-df_transactions = pd.read_excel(cd_data+"/WineKMC.xlsx", sheet_name=1)
-df_transactions.columns = ["customer_name", "offer_id"]
 df_transactions['n'] = 1
 df_transactions.head()
 # %% markdown
@@ -77,9 +77,13 @@ df_transactions.head()
 # </div>
 # %% codecell
 #your turn
-merged_df = pd.merge(df_offers, df_transactions)
-pivoted_df = merged_df.pivot_table(index='customer_name', columns='offer_id', values='n', fill_value=0)
-pivoted_df.fillna(0).reset_index()
+# Code customers and offers to integer indices and build the 0/1 matrix as
+# sparse CSR directly instead of merge + pivot_table (no NaNs to fill).
+from segmentation.features import build_offer_matrix, offer_matrix_frame
+
+X, customers, offer_ids = build_offer_matrix(df_transactions, offer_ids=df_offers['offer_id'])
+pivoted_df = offer_matrix_frame(X, customers, offer_ids)
+pivoted_df.reset_index()
 
 # %% markdown
 # ## 3. Modeling
@@ -113,23 +117,12 @@ pivoted_df.fillna(0).reset_index()
 # %% codecell
 # The SS value 6 has the better cluster becuase this is where the elbow starts to taper off.
 
-import sklearn.cluster
-import numpy as np
-
-ss = []
-
-assignments = {}
-
-X = pivoted_df.values
+from segmentation.sweep import sweep_k
 
 Krange  = list(range(2, 11))
 
-for K in Krange:
-    model = sklearn.cluster.KMeans(n_clusters=K)
-    assigned_cluster = model.fit_predict(X)
-    centers = model.cluster_centers_
-    ss.append(np.sum((X - centers[assigned_cluster]) ** 2))
-    assignments[str(K)] = assigned_cluster
+# Fits run in a process pool; SS comes from each model's inertia_.
+ss, assignments = sweep_k(X, Krange, n_jobs=-1)
 
 plt.plot(Krange, ss)
 plt.xlabel('K')
@@ -174,6 +167,16 @@ plt.savefig('figures/'+title+'.png')
 # </div>
 # %% codecell
 # Your turn.
+# Pairwise distances are computed once, in memory-bounded chunks, and shared
+# by every K; use approximate_silhouette on large customer bases.
+from segmentation.silhouette import silhouette_scores
+
+silhouette = silhouette_scores(X, assignments)
+
+plt.figure()
+plt.plot(Krange, [silhouette[str(K)] for K in Krange])
+plt.xlabel('K')
+plt.ylabel('Average Silhouette Score')
 
 # %% markdown
 # #### 3aiii.  Choosing $K$: The Gap Statistic
@@ -243,10 +246,15 @@ plt.savefig('figures/'+title+'.png')
 # </div>
 # %% codecell
 #your turn
-# Initialize a new PCA model with a default number of components.
-import sklearn.decomposition
-pca = sklearn.decomposition.PCA()
-pca.fit(X)
+# Only the leading components are computed (randomized SVD on the sparse X)
+# instead of a full PCA.
+from segmentation.projection import explained_variance_curve
+
+variance = explained_variance_curve(X, n_components=10)
+plt.figure()
+plt.plot(range(1, len(variance) + 1), variance)
+plt.xlabel("Number of Components")
+plt.ylabel("Proportion of Variance Explained")
 
 # Do the rest on your own :)
 
@@ -0,0 +1,198 @@
+"""Time each stage of the segmentation pipeline on synthetic data.
+
+    python benchmarks/bench_pipeline.py --customers 10000 100000 1000000 \
+        --offers 32 256 --density 0.05 -o bench_results.json
+
+For every size the stages (ingestion, pivot, K sweep, silhouette, PCA,
+lift) are timed separately with tracing off; each stage is run
+``--repeat`` times and ``wall_time`` is the fastest run, so a cold first
+run or a noisy neighbour does not count as a slowdown. Each record also
+holds ``peak_rss``, the RSS high-water mark of the stage's runs (reset
+before them on Linux, the process lifetime mark elsewhere) or of the
+largest reaped pool worker so far, and ``peak_memory``, the tracemalloc
+peak of one more, traced run of the stage (in-process allocations only;
+skipped with ``--no-memory-pass``). Results are written as JSON; with ``--baseline``
+the run fails if any stage is slower than the baseline by more than
+``--tolerance``. Stages that now take less than ``--min-time`` seconds are
+too short to time reliably and are never reported.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from segmentation import pipeline  # noqa: E402
+from segmentation.__main__ import parse_k_range  # noqa: E402
+from segmentation.ingest import load_workbook  # noqa: E402
+from segmentation.instrument import peak_rss, reset_peak_rss  # noqa: E402
+from segmentation.silhouette import approximate_silhouette  # noqa: E402
+from segmentation.sweep import sweep_k  # noqa: E402
+from segmentation.synthetic import make_offers_transactions, write_workbook  # noqa: E402
+
+EXCEL_MAX_ROWS = 1048575
+
+
+def timed(stages, name, repeat, memory_pass, func, *args, **kwargs):
+    """Run ``func`` ``repeat`` times untraced and keep the fastest as
+    ``wall_time``; with ``memory_pass`` run it once more under tracemalloc
+    for ``peak_memory``, so tracing never distorts the timings."""
+    reset_peak_rss()
+    times = []
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        times.append(time.perf_counter() - start)
+    record = {'wall_time': min(times), 'wall_times': times, 'peak_rss': peak_rss()}
+    if memory_pass:
+        tracemalloc.start()
+        try:
+            func(*args, **kwargs)
+            record['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    stages[name] = record
+    return result
+
+
+def bench_ingestion(stages, df_offers, df_transactions, repeat, memory_pass):
+    if len(df_transactions) > EXCEL_MAX_ROWS:
+        stages['ingestion'] = {'skipped': 'more rows than an Excel sheet holds'}
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'synthetic.xlsx')
+        write_workbook(path, df_offers, df_transactions)
+
+        def cold():
+            # A new cache directory per call, so every run is cold.
+            return load_workbook(path, cache_dir=tempfile.mkdtemp(dir=tmp))
+
+        warm_dir = os.path.join(tmp, 'warm')
+        timed(stages, 'ingestion', repeat, memory_pass, cold)
+        load_workbook(path, cache_dir=warm_dir)
+        timed(stages, 'ingestion_cached', repeat, memory_pass, load_workbook, path,
+              cache_dir=warm_dir)
+
+
+def bench_one(n_customers, n_offers, density, args):
+    df_offers, df_transactions = make_offers_transactions(
+        n_customers, n_offers, density, random_state=args.random_state)
+    stages = {}
+
+    repeat, memory_pass = args.repeat, not args.no_memory_pass
+    if not args.skip_ingestion:
+        bench_ingestion(stages, df_offers, df_transactions, repeat, memory_pass)
+
+    X, customers, offers = timed(stages, 'pivot', repeat, memory_pass, pipeline.pivot,
+                                 df_offers, df_transactions)
+    ss, assignments = timed(stages, 'sweep', repeat, memory_pass, sweep_k, X, args.k_range,
+                            n_jobs=args.n_jobs, random_state=args.random_state)
+    timed(stages, 'silhouette', repeat, memory_pass, approximate_silhouette, X, assignments,
+          sample_size=args.silhouette_sample, random_state=args.random_state)
+    timed(stages, 'pca', repeat, memory_pass, pipeline.project, X,
+          random_state=args.random_state)
+    labels = assignments[str(args.k_range[len(args.k_range) // 2])]
+    timed(stages, 'lift', repeat, memory_pass, pipeline.cluster_lift, X, labels, offers)
+
+    return {
+        'params': {
+            'n_customers': n_customers,
+            'n_offers': n_offers,
+            'density': density,
+            'n_transactions': len(df_transactions),
+            'nnz': int(X.nnz),
+        },
+        'stages': stages,
+    }
+
+
+def key(result):
+    p = result['params']
+    return p['n_customers'], p['n_offers'], p['density']
+
+
+def regressions(results, baseline, tolerance, min_time=0.05):
+    """Stages slower than the matching baseline entry by more than
+    ``tolerance``, ignoring stages that now take under ``min_time`` seconds."""
+    previous = {key(r): r['stages'] for r in baseline['results']}
+    found = []
+    for result in results:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        for stage, new in result['stages'].items():
+            if 'wall_time' not in new or 'wall_time' not in old.get(stage, {}):
+                continue
+            if new['wall_time'] < min_time:
+                continue
+            ratio = new['wall_time'] / max(old[stage]['wall_time'], 1e-9)
+            if ratio > 1 + tolerance:
+                found.append((key(result), stage, ratio))
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--customers', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--offers', type=int, nargs='+', default=[32])
+    parser.add_argument('--density', type=float, nargs='+', default=[0.1])
+    parser.add_argument('--k-range', type=parse_k_range, default=list(range(2, 11)))
+    parser.add_argument('-j', '--n-jobs', type=int, default=None)
+    parser.add_argument('--silhouette-sample', type=int, default=10000)
+    parser.add_argument('--skip-ingestion', action='store_true',
+                        help='do not write and re-read a workbook per size')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='runs per stage; the fastest is reported (default: 3)')
+    parser.add_argument('--no-memory-pass', action='store_true',
+                        help='skip the second, tracemalloc-traced run of each stage')
+    parser.add_argument('--random-state', type=int, default=0)
+    parser.add_argument('-o', '--output', default='bench_results.json')
+    parser.add_argument('--baseline', help='earlier results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed relative slowdown per stage (default: 0.25)')
+    parser.add_argument('--min-time', type=float, default=0.05,
+                        help='ignore stages faster than this many seconds when comparing '
+                             'against the baseline (default: 0.05)')
+    args = parser.parse_args(argv)
+
+    results = []
+    for n_customers in args.customers:
+        for n_offers in args.offers:
+            for density in args.density:
+                result = bench_one(n_customers, n_offers, density, args)
+                results.append(result)
+                print('%d customers, %d offers, density %g: %s' % (
+                    n_customers, n_offers, density,
+                    ', '.join('%s %.3fs' % (name, s['wall_time'])
+                              for name, s in result['stages'].items() if 'wall_time' in s)))
+
+    report = {
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'k_range': args.k_range,
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.tolerance, args.min_time)
+        for (n_customers, n_offers, density), stage, ratio in found:
+            print('REGRESSION %s at %d customers, %d offers, density %g: %.2fx baseline' % (
+                stage, n_customers, n_offers, density, ratio))
+        if found:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
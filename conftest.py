@@ -0,0 +1,2 @@
+# Keeps the repository root on sys.path so tests can import ``segmentation``
+# without installing it.
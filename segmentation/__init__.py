@@ -0,0 +1,64 @@
+"""Customer segmentation helpers for the WineKMC clustering case study."""
+from .cache import ResultCache, make_key, root_key
+from .compare import compare_algorithms, neighbor_graph
+from .features import build_offer_matrix, offer_matrix_frame
+from .ingest import file_fingerprint, load_workbook, read_workbook
+from .instrument import JsonLinesSink, StageRecorder, logging_sink
+from .lift import (
+    attribute_means,
+    attribute_shares,
+    cluster_offer_counts,
+    lift_matrix,
+    offer_lift,
+)
+from .model import SegmentModel
+from .pipeline import run
+from .projection import explained_variance_curve, project, randomized_pca
+from .silhouette import (
+    SilhouetteEstimate,
+    approximate_silhouette,
+    silhouette_samples_all,
+    silhouette_scores,
+)
+from .stability import StabilityResult, consensus_labels, stability_analysis
+from .streaming import StreamingSegmenter, iter_transactions
+from .sweep import split_largest, sweep_k
+from .synthetic import make_offers_transactions
+
+__all__ = [
+    'JsonLinesSink',
+    'ResultCache',
+    'SegmentModel',
+    'SilhouetteEstimate',
+    'StabilityResult',
+    'StageRecorder',
+    'StreamingSegmenter',
+    'approximate_silhouette',
+    'attribute_means',
+    'attribute_shares',
+    'build_offer_matrix',
+    'cluster_offer_counts',
+    'compare_algorithms',
+    'consensus_labels',
+    'explained_variance_curve',
+    'file_fingerprint',
+    'iter_transactions',
+    'lift_matrix',
+    'load_workbook',
+    'logging_sink',
+    'make_key',
+    'make_offers_transactions',
+    'neighbor_graph',
+    'offer_lift',
+    'offer_matrix_frame',
+    'project',
+    'randomized_pca',
+    'read_workbook',
+    'root_key',
+    'run',
+    'silhouette_samples_all',
+    'silhouette_scores',
+    'split_largest',
+    'stability_analysis',
+    'sweep_k',
+]
@@ -0,0 +1,85 @@
+"""Command-line entry point: ``python -m segmentation WineKMC.xlsx``."""
+import argparse
+import logging
+import sys
+
+from .cache import ResultCache
+from .ingest import DEFAULT_CACHE_DIR
+from .instrument import JsonLinesSink, StageRecorder, logging_sink
+from .pipeline import ALGORITHMS, run
+from .projection import METHODS as PCA_METHODS
+
+
+def parse_k_range(value):
+    """Parse ``"2-10"`` or ``"2,4,8"`` into a list of ints."""
+    if '-' in value:
+        low, high = value.split('-', 1)
+        return list(range(int(low), int(high) + 1))
+    return [int(k) for k in value.split(',')]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m segmentation',
+        description='Customer segmentation of the WineKMC offers/transactions workbook.')
+    parser.add_argument('input', help='path to the workbook (offers sheet, transactions sheet)')
+    parser.add_argument('--k-range', type=parse_k_range, default=list(range(2, 11)),
+                        help='K values to sweep, e.g. "2-10" or "3,5,8" (default: 2-10)')
+    parser.add_argument('-k', type=int, default=None,
+                        help='number of segments for the final model (default: best silhouette)')
+    parser.add_argument('--algorithm', choices=ALGORITHMS, default='kmeans')
+    parser.add_argument('-o', '--output-dir', default='output')
+    parser.add_argument('-j', '--n-jobs', type=int, default=None,
+                        help='worker processes for the K sweep (-1 for all cores)')
+    parser.add_argument('--figures', action='store_true', help='also write PNG figures')
+    parser.add_argument('--compare', action='store_true',
+                        help='also run DBSCAN, spectral, agglomerative and affinity '
+                             'propagation at the chosen K')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--no-cache', dest='cache_dir', action='store_const', const=None,
+                        help='always parse the workbook')
+    parser.add_argument('--stability', type=int, default=0, metavar='N',
+                        help='refit every K with N seeds and N bootstrap resamples and '
+                             'report label stability (adjusted Rand)')
+    parser.add_argument('--pca-method', choices=PCA_METHODS, default='randomized')
+    parser.add_argument('--pca-components', type=int, default=10,
+                        help='components for the explained-variance curve (default: 10)')
+    parser.add_argument('--result-cache', metavar='DIR',
+                        help='reuse stage results from earlier runs stored in DIR')
+    parser.add_argument('--result-cache-mb', type=int, default=1024,
+                        help='size limit of the result cache (default: 1024)')
+    parser.add_argument('--random-state', type=int, default=None)
+    parser.add_argument('--profile', action='store_true',
+                        help='log each stage as it finishes and print a timing summary')
+    parser.add_argument('--profile-json', metavar='PATH',
+                        help='append one JSON record per stage to PATH')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    sinks = []
+    if args.profile:
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+        sinks.append(logging_sink())
+    if args.profile_json:
+        sinks.append(JsonLinesSink(args.profile_json))
+    recorder = StageRecorder(sinks)
+    result_cache = None
+    if args.result_cache:
+        result_cache = ResultCache(args.result_cache, max_bytes=args.result_cache_mb << 20)
+
+    results = run(args.input, Krange=args.k_range, K=args.k, algorithm=args.algorithm,
+                  output_dir=args.output_dir, n_jobs=args.n_jobs, figures=args.figures,
+                  cache_dir=args.cache_dir, random_state=args.random_state,
+                  recorder=recorder, pca_method=args.pca_method,
+                  pca_components=args.pca_components, compare=args.compare,
+                  result_cache=result_cache, stability_runs=args.stability)
+    print('K = %d, results written to %s' % (results['K'], args.output_dir))
+    if args.profile:
+        print(recorder.summary())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
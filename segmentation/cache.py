@@ -0,0 +1,132 @@
+"""On-disk memoization of pipeline stage outputs.
+
+Each stage result is stored under a key derived from the key of its input
+data plus its own parameters (``make_key``), so changing a plotting option
+or one K re-runs nothing else, while new data or a new ``random_state``
+invalidates everything downstream. Keys chain — ``root_key`` combines the
+workbook fingerprint with ``CACHE_VERSION`` and the scikit-learn version,
+the pivot key is built from it, the K-Means keys from the pivot key, and
+so on — so upgrades never serve stale fits and large arrays are never
+re-hashed.
+
+Entries are pickle files in ``directory``. Reading an entry refreshes its
+mtime, and after every write the least recently used entries are removed
+until the directory fits in ``max_bytes``. The cache is meant for a local,
+trusted directory: do not point it at files you did not write.
+"""
+import hashlib
+import os
+import pickle
+
+import numpy as np
+import scipy.sparse as sp
+import sklearn
+
+# Bump when the layout of any cached stage output changes.
+CACHE_VERSION = 1
+
+_MISSING = object()
+
+
+def _update(digest, part):
+    if isinstance(part, np.ndarray):
+        digest.update(b'ndarray%s%r' % (part.dtype.str.encode(), part.shape))
+        digest.update(np.ascontiguousarray(part).data)
+    elif sp.issparse(part):
+        part = part.tocsr()
+        digest.update(b'sparse%r' % (part.shape,))
+        for array in (part.data, part.indices, part.indptr):
+            _update(digest, array)
+    elif isinstance(part, (list, tuple)):
+        digest.update(b'seq%d' % len(part))
+        for item in part:
+            _update(digest, item)
+    elif isinstance(part, dict):
+        digest.update(b'dict%d' % len(part))
+        for name in sorted(part):
+            _update(digest, name)
+            _update(digest, part[name])
+    else:
+        digest.update(repr(part).encode())
+    digest.update(b'\0')
+
+
+def root_key(fingerprint):
+    """Key for a data fingerprint under the current code and library
+    versions; chain every stage key from it so upgrades invalidate the
+    cache."""
+    return make_key('segmentation', CACHE_VERSION, sklearn.__version__, fingerprint)
+
+
+def make_key(*parts):
+    """Stable hex key for ``parts`` (strings, numbers, arrays, sparse
+    matrices, and lists/tuples/dicts of those)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        _update(digest, part)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Size-bounded LRU cache of pickled results in ``directory``."""
+
+    def __init__(self, directory, max_bytes=1 << 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.pkl')
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return default
+        os.utime(path)
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        tmp = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self.evict()
+
+    def memoize(self, key, func, *args, **kwargs):
+        """Return the cached value for ``key``, computing and storing
+        ``func(*args, **kwargs)`` on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = func(*args, **kwargs)
+            self.put(key, value)
+        return value
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.pkl'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith('.pkl'):
+                os.remove(os.path.join(self.directory, name))
@@ -0,0 +1,256 @@
+"""Side-by-side comparison of K-Means with the alternative algorithms
+from Exercise Set VI.
+
+The O(n^2) affinity/distance matrices those algorithms normally build are
+replaced by one sparse k-nearest-neighbour distance graph computed up
+front and shared:
+
+* DBSCAN runs on it as a precomputed sparse distance matrix, so only each
+  customer's ``n_neighbors`` nearest neighbours are considered.
+* Spectral clustering uses its 0/1 connectivity as a precomputed affinity
+  and solves for the embedding with LOBPCG, which scales to tens of
+  thousands of customers where ARPACK takes minutes.
+* Agglomerative (Ward) clustering uses it as the connectivity constraint.
+* Affinity propagation has no sparse formulation; it is run on a random
+  subsample of at most ``ap_max_samples`` customers and every customer is
+  then assigned to the nearest exemplar.
+
+Algorithms can run in a process pool (``n_jobs``). ``fit_time`` comes
+from an untraced fit. With ``measure_memory`` every algorithm is fitted a
+second time under tracemalloc and ``peak_memory`` is that fit's peak, so
+it is isolated per algorithm in both serial and pooled runs (allocations
+made outside Python's allocator, e.g. by OpenMP threads, are not counted);
+by default this is skipped and ``peak_memory`` is NaN.
+
+The default DBSCAN radius is the median distance to the
+``min_samples``-th neighbour. On 0/1 response data distances are square
+roots of how many offers two customers differ on, so any radius of one
+offer or more tends to chain most customers into a single cluster; pass
+``eps`` explicitly to explore other radii.
+"""
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import sklearn.cluster
+from sklearn.metrics import adjusted_rand_score, pairwise_distances_argmin
+from sklearn.neighbors import kneighbors_graph
+
+from .silhouette import approximate_silhouette
+
+
+def _kmeans(X, graph, params):
+    model = sklearn.cluster.KMeans(n_clusters=params['n_clusters'],
+                                   random_state=params['random_state'])
+    return model.fit_predict(X)
+
+
+def _dbscan(X, graph, params):
+    model = sklearn.cluster.DBSCAN(eps=params['eps'], min_samples=params['min_samples'],
+                                   metric='precomputed')
+    return model.fit_predict(graph)
+
+
+def _spectral(X, graph, params):
+    model = sklearn.cluster.SpectralClustering(
+        n_clusters=params['n_clusters'], affinity='precomputed', eigen_solver='lobpcg',
+        random_state=params['random_state'])
+    return model.fit_predict(_connectivity(graph))
+
+
+def _agglomerative(X, graph, params):
+    # Ward needs dense features (n x offers, not n x n); the graph keeps
+    # the merge search local.
+    model = sklearn.cluster.AgglomerativeClustering(
+        n_clusters=params['n_clusters'], linkage='ward',
+        connectivity=_connectivity(graph))
+    return model.fit_predict(X.toarray() if sp.issparse(X) else X)
+
+
+def _affinity_propagation(X, graph, params):
+    n = X.shape[0]
+    rng = np.random.default_rng(params['random_state'])
+    sample = np.sort(rng.choice(n, size=min(n, params['ap_max_samples']), replace=False))
+    sub = X[sample]
+    model = sklearn.cluster.AffinityPropagation(random_state=params['random_state'])
+    model.fit(sub.toarray() if sp.issparse(sub) else sub)
+    exemplars = sub[model.cluster_centers_indices_]
+    if len(model.cluster_centers_indices_) == 0:
+        return np.full(n, -1)
+    return pairwise_distances_argmin(X, exemplars)
+
+
+ALGORITHMS = {
+    'KMeans': _kmeans,
+    'DBSCAN': _dbscan,
+    'SpectralClustering': _spectral,
+    'AgglomerativeClustering': _agglomerative,
+    'AffinityPropagation': _affinity_propagation,
+}
+
+_worker_data = None
+
+
+def _init_worker(X, graph):
+    global _worker_data
+    _worker_data = (X, graph)
+
+
+def _run_worker(name, params, measure_memory):
+    return _run(name, _worker_data[0], _worker_data[1], params, measure_memory)
+
+
+def _run(name, X, graph, params, measure_memory):
+    start = time.perf_counter()
+    labels = ALGORITHMS[name](X, graph, params)
+    fit_time = time.perf_counter() - start
+
+    peak = np.nan
+    if measure_memory:
+        tracemalloc.start()
+        try:
+            ALGORITHMS[name](X, graph, params)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return labels, fit_time, peak
+
+
+def neighbor_graph(X, n_neighbors=15, n_jobs=None):
+    """Symmetric sparse kNN distance graph of ``X``.
+
+    Stored entries are Euclidean distances, including explicit zeros for
+    identical customers; the graph is symmetrized by taking the union of
+    both directions.
+    """
+    return _symmetrize(kneighbors_graph(X, n_neighbors=n_neighbors, mode='distance',
+                                        n_jobs=n_jobs))
+
+
+def _symmetrize(graph):
+    # Union of both directions. Done by hand rather than with maximum()
+    # so that zero distances (identical customers) stay stored as edges.
+    coo = graph.tocoo()
+    rows = np.concatenate([coo.row, coo.col])
+    cols = np.concatenate([coo.col, coo.row])
+    data = np.concatenate([coo.data, coo.data])
+    n = graph.shape[0]
+    _, first = np.unique(rows.astype(np.int64) * n + cols, return_index=True)
+    return sp.csr_matrix((data[first], (rows[first], cols[first])), shape=graph.shape)
+
+
+def _connectivity(graph):
+    conn = graph.copy()
+    conn.data[:] = 1.0
+    return conn
+
+
+def _kth_distance(graph, k):
+    """Distance from each row of ``graph`` to its k-th nearest stored
+    neighbour.
+
+    Symmetrizing only adds edges at least as long as a row's own kNN
+    distances, so on ``neighbor_graph`` this is the plain kNN distance.
+    """
+    rows = np.repeat(np.arange(graph.shape[0]), np.diff(graph.indptr))
+    distances = graph.data[np.lexsort((graph.data, rows))]
+    return distances[graph.indptr[:-1] + k - 1]
+
+
+def _default_eps(graph, min_samples):
+    # DBSCAN's min_samples counts the point itself. The radius must be
+    # positive, so when most customers have identical twins the median
+    # falls back to the shortest non-zero edge.
+    eps = float(np.median(_kth_distance(graph, max(min_samples - 1, 1))))
+    if eps == 0:
+        positive = graph.data[graph.data > 0]
+        eps = float(positive.min()) if len(positive) else 1.0
+    return eps
+
+
+def compare_algorithms(X, n_clusters, algorithms=None, n_neighbors=15, eps=None,
+                       min_samples=5, ap_max_samples=2000, n_jobs=None,
+                       silhouette_sample=10000, measure_memory=False, random_state=None):
+    """Run each algorithm on ``X`` and report timing, memory and quality.
+
+    Parameters
+    ----------
+    X : array or sparse matrix
+    n_clusters : int
+        For the algorithms that take one.
+    algorithms : list of str, optional
+        Keys of ``ALGORITHMS``; all of them by default.
+    n_neighbors : int
+        Neighbours per customer in the shared graph.
+    eps : float, optional
+        DBSCAN radius; defaults to the median distance to the
+        ``min_samples``-th neighbour (see the module docstring).
+    n_jobs : int, optional
+        Worker processes for the graph and the fits; ``None`` or 1 runs
+        serially.
+    measure_memory : bool
+        Fit every algorithm a second time under tracemalloc to report its
+        ``peak_memory``; roughly doubles the fitting time.
+
+    Returns
+    -------
+    report : DataFrame
+        Indexed by algorithm, with ``n_clusters`` (found), ``noise_fraction``,
+        ``fit_time``, ``peak_memory``, ``silhouette`` (estimated, noise counted
+        as one cluster) and ``ari_vs_kmeans``. A ``knn_graph`` row records
+        the cost of building the shared graph.
+    labels : dict
+        Algorithm name -> label array.
+    """
+    algorithms = list(algorithms or ALGORITHMS)
+    unknown = set(algorithms) - set(ALGORITHMS)
+    if unknown:
+        raise ValueError('unknown algorithms: %s' % ', '.join(sorted(unknown)))
+
+    start = time.perf_counter()
+    graph = neighbor_graph(X, n_neighbors=max(n_neighbors, min_samples), n_jobs=n_jobs)
+    graph_time = time.perf_counter() - start
+
+    if eps is None:
+        eps = _default_eps(graph, min_samples)
+
+    params = {
+        'n_clusters': n_clusters,
+        'eps': eps,
+        'min_samples': min_samples,
+        'ap_max_samples': ap_max_samples,
+        'random_state': random_state,
+    }
+
+    if n_jobs is not None and n_jobs != 1 and len(algorithms) > 1:
+        workers = None if n_jobs < 0 else n_jobs
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(X, graph)) as pool:
+            outcomes = list(pool.map(_run_worker, algorithms, [params] * len(algorithms),
+                                     [measure_memory] * len(algorithms)))
+    else:
+        outcomes = [_run(name, X, graph, params, measure_memory) for name in algorithms]
+
+    labels = {name: result[0] for name, result in zip(algorithms, outcomes)}
+    scores = approximate_silhouette(X, {name: l for name, l in labels.items()
+                                        if len(np.unique(l)) > 1},
+                                    sample_size=silhouette_sample, random_state=random_state)
+    reference = labels.get('KMeans')
+
+    rows = [{'algorithm': 'knn_graph', 'fit_time': graph_time}]
+    for name, (result, fit_time, peak) in zip(algorithms, outcomes):
+        rows.append({
+            'algorithm': name,
+            'n_clusters': len(np.unique(result[result >= 0])),
+            'noise_fraction': float(np.mean(result < 0)),
+            'fit_time': fit_time,
+            'peak_memory': peak,
+            'silhouette': scores[name].score if name in scores else np.nan,
+            'ari_vs_kmeans': (adjusted_rand_score(reference, result)
+                              if reference is not None else np.nan),
+        })
+    return pd.DataFrame(rows).set_index('algorithm'), labels
+
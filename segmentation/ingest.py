@@ -0,0 +1,70 @@
+"""Cached loading of the WineKMC workbook.
+
+Parsing the workbook with openpyxl dominates startup on larger files. The
+first ``load_workbook`` call converts the offers and transactions sheets to
+Parquet files in a cache directory; later calls read those instead. The
+cache key combines the workbook's size, mtime and a content hash, so an
+edited workbook is re-parsed. If pyarrow is not installed the workbook is
+read directly every time.
+"""
+import hashlib
+import os
+
+import pandas as pd
+
+OFFER_COLUMNS = ["offer_id", "campaign", "varietal", "min_qty", "discount", "origin", "past_peak"]
+TRANSACTION_COLUMNS = ["customer_name", "offer_id"]
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'segmentation')
+
+
+def file_fingerprint(path, block_size=1 << 20):
+    """Hex digest of ``path``'s size, mtime and contents."""
+    stat = os.stat(path)
+    digest = hashlib.sha256(('%d:%d:' % (stat.st_size, stat.st_mtime_ns)).encode())
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_workbook(path):
+    """Parse both sheets with ``pd.read_excel`` and apply the study's column names."""
+    df_offers = pd.read_excel(path, sheet_name=0)
+    df_offers.columns = OFFER_COLUMNS
+    df_transactions = pd.read_excel(path, sheet_name=1)
+    df_transactions.columns = TRANSACTION_COLUMNS
+    return df_offers, df_transactions
+
+
+def load_workbook(path, cache_dir=DEFAULT_CACHE_DIR, use_cache=True, fingerprint=None):
+    """Return ``(df_offers, df_transactions)`` for the workbook at ``path``.
+
+    The frames have the same columns the case study assigns after
+    ``pd.read_excel``; the ``n`` indicator column is not added. Pass
+    ``fingerprint`` if ``file_fingerprint(path)`` is already known, to
+    avoid hashing the file again.
+    """
+    if not use_cache or cache_dir is None:
+        return read_workbook(path)
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return read_workbook(path)
+
+    key = fingerprint or file_fingerprint(path)
+    offers_path = os.path.join(cache_dir, key + '.offers.parquet')
+    transactions_path = os.path.join(cache_dir, key + '.transactions.parquet')
+
+    if os.path.exists(offers_path) and os.path.exists(transactions_path):
+        return pd.read_parquet(offers_path), pd.read_parquet(transactions_path)
+
+    df_offers, df_transactions = read_workbook(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Write under a temporary name and rename so a crashed run never leaves
+    # a truncated file behind under the real key.
+    for df, target in ((df_offers, offers_path), (df_transactions, transactions_path)):
+        tmp = '%s.%d.tmp' % (target, os.getpid())
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, target)
+    return df_offers, df_transactions
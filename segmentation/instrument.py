@@ -0,0 +1,206 @@
+"""Per-stage timing and memory instrumentation.
+
+A ``StageRecorder`` wraps pipeline stages with ``recorder.stage(name)`` (a
+context manager) or ``@recorder.track(name)`` (a decorator) and records,
+for each stage, wall time, CPU time (including reaped child processes,
+e.g. the K sweep's pool), peak RSS and the shapes of its inputs.
+Every record is handed to the recorder's sinks as it completes — see
+``logging_sink`` and ``JsonLinesSink`` — and ``summary()`` formats all of
+them as a table for the end of a run.
+
+On Linux each stage resets the kernel's RSS high-water mark (by writing
+``5`` to ``/proc/self/clear_refs``) and reads ``VmHWM`` when it ends, so
+``peak_rss`` is the peak within that stage and ``rss_growth`` how far it
+rose above the RSS the stage started with. Child processes are counted when
+one finished during the stage with a new highest peak. Elsewhere, or when
+the reset is refused, ``peak_rss`` falls back to the process's lifetime
+high-water mark, which only grows over a run, and ``rss_growth`` is how
+much the stage raised it; ``peak_rss_scope`` says which one a record holds.
+Stages should not be nested, as an inner stage resets the outer one's peak.
+"""
+import functools
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _proc_status(field):
+    # Value of a "kB" field of /proc/self/status in bytes, None off Linux.
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return 1024 * int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _maxrss(children=False):
+    if resource is None:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    # ru_maxrss is in KiB on Linux and bytes on macOS.
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return scale * resource.getrusage(who).ru_maxrss
+
+
+def _own_peak():
+    peak = _proc_status('VmHWM')
+    return peak if peak is not None else _maxrss()
+
+
+def _children_peak():
+    return _maxrss(children=True)
+
+
+def reset_peak_rss():
+    """Restart this process's RSS high-water mark. Returns ``False`` where
+    the kernel does not support it (anything but Linux, or a refused write
+    to ``/proc/self/clear_refs``)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        return False
+    return True
+
+
+def peak_rss():
+    """Peak resident set size in bytes of this process (since the last
+    ``reset_peak_rss``, where supported) and of its reaped children, or
+    ``None`` where neither can be read."""
+    peaks = [p for p in (_own_peak(), _children_peak()) if p is not None]
+    return max(peaks) if peaks else None
+
+
+def _cpu_time():
+    # process_time() leaves out pool workers; os.times() adds the CPU time
+    # of every child that has been waited for.
+    times = os.times()
+    return time.process_time() + times.children_user + times.children_system
+
+
+def _max(*values):
+    values = [v for v in values if v is not None]
+    return max(values) if values else None
+
+
+def shape_of(value):
+    """``value.shape`` or ``len(value)`` as a list, else ``None``."""
+    shape = getattr(value, 'shape', None)
+    if shape is not None:
+        return list(shape)
+    try:
+        return [len(value)]
+    except TypeError:
+        return None
+
+
+def logging_sink(logger=None, level=logging.INFO):
+    """Sink that logs one line per finished stage."""
+    logger = logger or logging.getLogger('segmentation')
+
+    def sink(record):
+        logger.log(level, '%s: %.3fs wall, %.3fs cpu, peak rss %s, inputs %s',
+                   record['stage'], record['wall_time'], record['cpu_time'],
+                   _format_bytes(record['peak_rss']), record['inputs'])
+    return sink
+
+
+class JsonLinesSink:
+    """Sink that appends each record as one JSON line to ``path``."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self, record):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+
+
+class StageRecorder:
+    """Collects one record per pipeline stage and forwards it to ``sinks``."""
+
+    def __init__(self, sinks=()):
+        self.sinks = list(sinks)
+        self.records = []
+
+    @contextmanager
+    def stage(self, name, **inputs):
+        """Time the enclosed block. Keyword arguments are recorded by shape."""
+        scoped = reset_peak_rss()
+        rss_before = _proc_status('VmRSS') if scoped else peak_rss()
+        children_before = _children_peak()
+        cpu = _cpu_time()
+        wall = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = _cpu_time() - cpu
+            if scoped:
+                children = _children_peak()
+                # A child's peak only belongs to this stage if it is a new maximum.
+                rss_after = _max(_own_peak(),
+                                 children if children != children_before else None)
+            else:
+                rss_after = peak_rss()
+            record = {
+                'stage': name,
+                'wall_time': wall,
+                'cpu_time': cpu,
+                'peak_rss': rss_after,
+                'peak_rss_scope': 'stage' if scoped else 'process',
+                'rss_growth': (None if rss_after is None or rss_before is None
+                               else rss_after - rss_before),
+                'inputs': {key: shape_of(value) for key, value in inputs.items()},
+            }
+            self.records.append(record)
+            for sink in self.sinks:
+                sink(record)
+
+    def track(self, name=None):
+        """Decorator form of ``stage``; positional array arguments are
+        recorded by shape as ``arg0``, ``arg1``, ..."""
+        def decorate(func):
+            stage_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                inputs = {'arg%d' % i: a for i, a in enumerate(args)
+                          if shape_of(a) is not None and not isinstance(a, str)}
+                with self.stage(stage_name, **inputs):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def summary(self):
+        """Table of all recorded stages with their share of total wall time."""
+        total = sum(r['wall_time'] for r in self.records) or 1.0
+        lines = ['%-14s %10s %10s %7s %12s  %s' % (
+            'stage', 'wall (s)', 'cpu (s)', 'wall %', 'peak rss', 'inputs')]
+        for r in self.records:
+            lines.append('%-14s %10.3f %10.3f %6.1f%% %12s  %s' % (
+                r['stage'], r['wall_time'], r['cpu_time'], 100 * r['wall_time'] / total,
+                _format_bytes(r['peak_rss']),
+                ' '.join('%s=%s' % (k, 'x'.join(map(str, v))) for k, v in r['inputs'].items()
+                         if v is not None)))
+        return '\n'.join(lines)
+
+
+def _format_bytes(n):
+    if n is None:
+        return '-'
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if n < 1024 or unit == 'GiB':
+            return '%.1f %s' % (n, unit)
+        n /= 1024.0
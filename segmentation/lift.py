@@ -0,0 +1,122 @@
+"""Per-cluster offer lift and offer-attribute profiles.
+
+Everything is computed for all clusters at once from one sparse product
+``M @ X``, where ``M`` is the cluster x customer indicator matrix: row k of
+the result counts how many customers in cluster k took each offer. Offer
+attributes are then aggregated from those counts, so the cost is
+O(nnz(X) + clusters x offers) whatever the number of clusters.
+
+Lift is the difference between a cluster's response rate and the overall
+rate, as in the study; ``lift_ratio`` is their quotient.
+
+Every function takes an optional ``grouped`` argument: the
+``(clusters, sizes, counts)`` tuple from ``cluster_offer_counts``. Pass it
+to compute several views from a single ``M @ X`` product.
+"""
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+
+def cluster_offer_counts(X, labels):
+    """Return ``(clusters, sizes, counts)``.
+
+    ``counts`` is a dense (n_clusters, n_offers) array of responses per
+    cluster; ``sizes`` the number of customers in each cluster.
+    """
+    clusters, codes = np.unique(labels, return_inverse=True)
+    codes = codes.ravel()
+    M = sp.csr_matrix((np.ones(len(codes)), (codes, np.arange(len(codes)))),
+                      shape=(len(clusters), len(codes)))
+    counts = np.asarray((M @ X).todense()) if sp.issparse(X) else M @ X
+    sizes = np.bincount(codes, minlength=len(clusters))
+    return clusters, sizes, counts
+
+
+def offer_lift(X, labels, offers, grouped=None):
+    """Tidy frame with one row per (cluster, offer).
+
+    Columns: ``cluster``, ``offer_id``, ``n_customers``, ``responses``,
+    ``proportion``, ``overall_proportion``, ``lift``, ``lift_ratio``.
+    """
+    clusters, sizes, counts = grouped or cluster_offer_counts(X, labels)
+    proportion = counts / sizes[:, None]
+    overall = counts.sum(axis=0) / sizes.sum()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = proportion / overall
+
+    n_clusters, n_offers = counts.shape
+    return pd.DataFrame({
+        'cluster': np.repeat(clusters, n_offers),
+        'offer_id': np.tile(np.asarray(offers), n_clusters),
+        'n_customers': np.repeat(sizes, n_offers),
+        'responses': counts.ravel(),
+        'proportion': proportion.ravel(),
+        'overall_proportion': np.tile(overall, n_clusters),
+        'lift': (proportion - overall).ravel(),
+        'lift_ratio': ratio.ravel(),
+    })
+
+
+def lift_matrix(X, labels, offers, grouped=None):
+    """Lift as a wide frame: one row per cluster, one column per offer."""
+    clusters, sizes, counts = grouped or cluster_offer_counts(X, labels)
+    overall = counts.sum(axis=0) / sizes.sum()
+    return pd.DataFrame(counts / sizes[:, None] - overall,
+                        index=pd.Index(clusters, name='cluster'), columns=offers)
+
+
+def _offer_attribute(df_offers, offers, attribute):
+    # Align the attribute to the matrix's offer columns.
+    return df_offers.set_index('offer_id')[attribute].reindex(offers)
+
+
+def attribute_shares(X, labels, df_offers, offers, attributes=('varietal', 'origin'),
+                     grouped=None):
+    """Share of each cluster's responses going to each attribute value.
+
+    Tidy frame with columns ``cluster``, ``attribute``, ``value``,
+    ``responses``, ``share``, ``overall_share`` and ``lift``.
+    """
+    clusters, _, counts = grouped or cluster_offer_counts(X, labels)
+    totals = counts.sum(axis=1)
+    frames = []
+    for attribute in attributes:
+        values, codes = np.unique(
+            _offer_attribute(df_offers, offers, attribute).astype(str).to_numpy(),
+            return_inverse=True)
+        onehot = sp.csr_matrix((np.ones(len(codes)), (np.arange(len(codes)), codes.ravel())),
+                               shape=(len(codes), len(values)))
+        responses = np.asarray(onehot.T @ counts.T).T
+        with np.errstate(divide='ignore', invalid='ignore'):
+            share = responses / totals[:, None]
+        overall = responses.sum(axis=0) / totals.sum()
+        frames.append(pd.DataFrame({
+            'cluster': np.repeat(clusters, len(values)),
+            'attribute': attribute,
+            'value': np.tile(values, len(clusters)),
+            'responses': responses.ravel(),
+            'share': share.ravel(),
+            'overall_share': np.tile(overall, len(clusters)),
+            'lift': (share - overall).ravel(),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def attribute_means(X, labels, df_offers, offers, attributes=('discount', 'min_qty'),
+                    grouped=None):
+    """Response-weighted mean of numeric offer attributes per cluster.
+
+    Returns a frame indexed by cluster with one column per attribute, plus
+    an ``'overall'`` row for all customers.
+    """
+    clusters, _, counts = grouped or cluster_offer_counts(X, labels)
+    values = np.column_stack([
+        _offer_attribute(df_offers, offers, attribute).astype(float).to_numpy()
+        for attribute in attributes
+    ])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        means = (counts @ values) / counts.sum(axis=1)[:, None]
+    overall = counts.sum(axis=0) @ values / counts.sum()
+    index = pd.Index(list(clusters) + ['overall'], name='cluster')
+    return pd.DataFrame(np.vstack([means, overall]), index=index, columns=list(attributes))
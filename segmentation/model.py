@@ -0,0 +1,78 @@
+"""Persisting a fitted segmentation and scoring new customers against it.
+
+A ``SegmentModel`` is just the cluster centers and the offer columns they
+are defined over. It is saved as a small ``.npz`` file and loaded without
+pickle. Scoring is a vectorized nearest-center lookup: with
+``||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2`` and ``||x||^2`` constant per
+customer, the nearest center is ``argmax(2 x.c - ||c||^2)``, a single
+sparse-dense product for a whole batch.
+"""
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from .features import build_offer_matrix
+
+FORMAT_VERSION = 1
+
+
+class SegmentModel:
+    """Cluster centers over a fixed set of offer columns.
+
+    Parameters
+    ----------
+    centers : array of shape (K, n_offers)
+    offer_ids : array-like of length n_offers
+        The offer id of each center column.
+    """
+
+    def __init__(self, centers, offer_ids):
+        self.centers = np.asarray(centers, dtype=np.float64)
+        self.offer_ids = pd.Index(offer_ids, name='offer_id')
+        if self.centers.shape[1] != len(self.offer_ids):
+            raise ValueError('centers have %d columns but %d offer ids were given'
+                             % (self.centers.shape[1], len(self.offer_ids)))
+        self._centers_t = np.ascontiguousarray(2 * self.centers.T)
+        self._center_norms = (self.centers ** 2).sum(axis=1)
+
+    @property
+    def K(self):
+        return self.centers.shape[0]
+
+    @classmethod
+    def from_estimator(cls, estimator, offer_ids):
+        """Wrap a fitted ``KMeans``/``MiniBatchKMeans``."""
+        return cls(estimator.cluster_centers_, offer_ids)
+
+    def save(self, path):
+        """Write the model to ``path`` (``.npz``)."""
+        offer_ids = np.asarray(self.offer_ids)
+        if offer_ids.dtype == object:
+            offer_ids = offer_ids.astype(str)
+        np.savez_compressed(path, version=FORMAT_VERSION, centers=self.centers,
+                            offer_ids=offer_ids)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data['version'])
+            if version != FORMAT_VERSION:
+                raise ValueError('unsupported model format version %d' % version)
+            return cls(data['centers'], data['offer_ids'])
+
+    def predict(self, X):
+        """Nearest center for each row of ``X`` (dense or sparse, columns in
+        ``offer_ids`` order)."""
+        scores = X @ self._centers_t
+        if sp.issparse(scores):
+            scores = scores.toarray()
+        return np.asarray(scores - self._center_norms).argmax(axis=1)
+
+    def score_transactions(self, df_transactions):
+        """Segment of every customer in a transactions batch.
+
+        Offers the model was not fitted on are ignored. Returns a Series of
+        cluster ids indexed by ``customer_name``.
+        """
+        X, customers, _ = build_offer_matrix(df_transactions, offer_ids=self.offer_ids)
+        return pd.Series(self.predict(X), index=customers, name='cluster')
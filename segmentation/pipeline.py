@@ -0,0 +1,246 @@
+"""The case study as an importable load -> pivot -> K sweep -> PCA -> lift
+pipeline.
+
+Every step is a plain function so runs can be scripted, scheduled and
+profiled; ``run`` chains them and optionally writes results and figures to
+an output directory. Nothing here imports matplotlib — figures are drawn by
+``segmentation.plots``, which is only imported when figures are requested.
+"""
+import os
+
+import pandas as pd
+import sklearn.cluster
+
+from . import projection
+from .compare import compare_algorithms
+from .cache import make_key, root_key
+from .features import build_offer_matrix
+from .ingest import DEFAULT_CACHE_DIR, file_fingerprint, load_workbook
+from .instrument import StageRecorder
+from .lift import attribute_means, attribute_shares, cluster_offer_counts, lift_matrix
+from .model import SegmentModel
+from .silhouette import approximate_silhouette
+from .stability import stability_analysis
+from .sweep import sweep_k
+
+ALGORITHMS = ('kmeans', 'minibatch')
+
+
+def load(path, cache_dir=DEFAULT_CACHE_DIR, fingerprint=None):
+    """Read ``(df_offers, df_transactions)`` from the workbook."""
+    return load_workbook(path, cache_dir=cache_dir, fingerprint=fingerprint)
+
+
+def pivot(df_offers, df_transactions):
+    """Sparse customer x offer matrix with one column per offer in ``df_offers``."""
+    return build_offer_matrix(df_transactions, offer_ids=df_offers['offer_id'])
+
+
+def choose_k(X, assignments, sample_size=10000, random_state=None):
+    """Pick the K with the highest (estimated) mean silhouette.
+
+    Returns ``(best_K, scores)`` where ``scores`` maps ``str(K)`` to the
+    silhouette estimate.
+    """
+    scores = approximate_silhouette(X, assignments, sample_size=sample_size,
+                                    random_state=random_state)
+    best = max(scores, key=lambda key: scores[key].score)
+    return int(best), scores
+
+
+def fit_clusters(X, K, algorithm='kmeans', random_state=None):
+    """Fit the final model for ``K`` clusters and return ``(model, labels)``."""
+    if algorithm == 'kmeans':
+        model = sklearn.cluster.KMeans(n_clusters=K, random_state=random_state)
+    elif algorithm == 'minibatch':
+        model = sklearn.cluster.MiniBatchKMeans(n_clusters=K, random_state=random_state,
+                                                n_init='auto')
+    else:
+        raise ValueError('unknown algorithm %r, expected one of %s' % (algorithm, ALGORITHMS))
+    labels = model.fit_predict(X)
+    return model, labels
+
+
+def project(X, n_components=2, method='randomized', random_state=None):
+    """PCA projection of ``X``; returns ``(coords, explained_variance_ratio)``.
+
+    Only ``n_components`` components are computed; see
+    ``segmentation.projection`` for the methods.
+    """
+    return projection.project(X, n_components, method=method, random_state=random_state)
+
+
+def cluster_lift(X, labels, offers, grouped=None):
+    """How much more (or less) often each cluster took each offer than
+    customers overall.
+
+    Returns a frame indexed by cluster with one column per offer; see
+    ``segmentation.lift`` for the tidy and attribute-level views.
+    """
+    return lift_matrix(X, labels, offers, grouped=grouped)
+
+
+def profile(X, labels, df_offers, offers, grouped=None):
+    """Per-cluster varietal/origin response shares and mean discount/min_qty."""
+    return (attribute_shares(X, labels, df_offers, offers, grouped=grouped),
+            attribute_means(X, labels, df_offers, offers, grouped=grouped))
+
+
+def cached_sweep(X, Krange, cache, data_key, n_jobs=None, random_state=None):
+    """``sweep_k(..., return_centers=True)`` that stores each K's labels,
+    centers and inertia in ``cache`` and only fits the K values it has not
+    seen for ``data_key``."""
+    keys = {K: make_key('kmeans', data_key, K, random_state) for K in Krange}
+    fits = {K: cache.get(keys[K]) for K in Krange}
+    missing = [K for K in Krange if fits[K] is None]
+    if missing:
+        ss, assignments, centers = sweep_k(X, missing, n_jobs=n_jobs,
+                                           random_state=random_state, return_centers=True)
+        for K, inertia in zip(missing, ss):
+            fits[K] = {'labels': assignments[str(K)], 'centers': centers[str(K)],
+                       'inertia': inertia}
+            cache.put(keys[K], fits[K])
+    return ([fits[K]['inertia'] for K in Krange],
+            {str(K): fits[K]['labels'] for K in Krange},
+            {str(K): fits[K]['centers'] for K in Krange})
+
+
+def _memoize(cache, key, func, *args, **kwargs):
+    if cache is None or key is None:
+        return func(*args, **kwargs)
+    return cache.memoize(key, func, *args, **kwargs)
+
+
+def run(path, Krange=range(2, 11), K=None, algorithm='kmeans', output_dir=None,
+        n_jobs=None, figures=False, cache_dir=DEFAULT_CACHE_DIR, random_state=None,
+        recorder=None, pca_method='randomized', pca_components=10, compare=False,
+        result_cache=None, stability_runs=0):
+    """Run the whole study on the workbook at ``path``.
+
+    ``K`` fixes the number of segments; by default it is chosen by
+    silhouette over ``Krange``. For ``algorithm='kmeans'`` and a ``K`` in
+    ``Krange`` the sweep's fit is reused as the final segmentation; other
+    choices are fitted separately. Results are returned as a dict and, when
+    ``output_dir`` is given, written there as CSV, with the fitted centers
+    saved as ``model.npz`` for ``SegmentModel.load`` (plus PNG figures if
+    ``figures`` is set). The PCA step computes ``pca_components``
+    components for the explained-variance curve and plots the first two.
+    With ``compare`` the alternative algorithms are also run at ``K`` (see
+    ``segmentation.compare``). With ``stability_runs`` every K is also
+    refitted that many times with different seeds and on as many bootstrap
+    resamples (see ``segmentation.stability``).
+
+    Each step is timed as a stage of ``recorder`` (a fresh
+    ``StageRecorder`` if none is given); its records are returned under
+    ``'stages'``. With a ``ResultCache`` as ``result_cache``, the pivot
+    matrix, per-K fits, silhouettes, final fit and PCA are reused from
+    earlier runs on the same workbook and parameters. Stages that depend on
+    randomness are only cached when ``random_state`` is fixed.
+    """
+    if recorder is None:
+        recorder = StageRecorder()
+    Krange = list(Krange)
+
+    cache = result_cache
+    seeded = cache is not None and random_state is not None
+
+    def seeded_key(*parts):
+        return make_key(data_key, random_state, *parts) if seeded else None
+
+    with recorder.stage('load'):
+        # Hash the workbook once and share it with the ingestion cache.
+        fingerprint = None
+        if cache is not None or cache_dir is not None:
+            fingerprint = file_fingerprint(path)
+        df_offers, df_transactions = load(path, cache_dir=cache_dir, fingerprint=fingerprint)
+    data_key = make_key('pivot', root_key(fingerprint)) if cache is not None else None
+    with recorder.stage('pivot', transactions=df_transactions):
+        X, customers, offers = _memoize(cache, data_key, pivot, df_offers, df_transactions)
+
+    with recorder.stage('sweep', X=X, Krange=Krange):
+        if seeded:
+            ss, assignments, centers = cached_sweep(X, Krange, cache, data_key,
+                                                    n_jobs=n_jobs, random_state=random_state)
+        else:
+            ss, assignments, centers = sweep_k(X, Krange, n_jobs=n_jobs,
+                                               random_state=random_state,
+                                               return_centers=True)
+    with recorder.stage('silhouette', X=X, Krange=Krange):
+        best_K, silhouette = _memoize(cache, seeded_key('silhouette', Krange), choose_k,
+                                      X, assignments, random_state=random_state)
+    if K is None:
+        K = best_K
+
+    with recorder.stage('fit', X=X):
+        if algorithm == 'kmeans' and K in Krange:
+            # The sweep already fitted this K with the same estimator settings.
+            labels = assignments[str(K)]
+            segment_model = SegmentModel(centers[str(K)], offers)
+        else:
+            model, labels = _memoize(cache, seeded_key('fit', K, algorithm), fit_clusters,
+                                     X, K, algorithm=algorithm, random_state=random_state)
+            segment_model = SegmentModel.from_estimator(model, offers)
+    with recorder.stage('pca', X=X):
+        n_components = max(2, pca_components)
+        coords, variance = _memoize(cache, seeded_key('pca', n_components, pca_method),
+                                    project, X, n_components, method=pca_method,
+                                    random_state=random_state)
+    with recorder.stage('lift', X=X):
+        grouped = cluster_offer_counts(X, labels)
+        lift = cluster_lift(X, labels, offers, grouped=grouped)
+        shares, means = profile(X, labels, df_offers, offers, grouped=grouped)
+
+    if compare:
+        with recorder.stage('compare', X=X):
+            comparison, _ = compare_algorithms(X, K, n_jobs=n_jobs, random_state=random_state)
+
+    if stability_runs:
+        with recorder.stage('stability', X=X, Krange=Krange):
+            stability = stability_analysis(X, Krange, n_seeds=stability_runs,
+                                           n_bootstrap=stability_runs, n_jobs=n_jobs,
+                                           random_state=random_state)
+
+    results = {
+        'sweep': pd.DataFrame({
+            'K': Krange,
+            'ss': ss,
+            'silhouette': [silhouette[str(k)].score for k in Krange],
+        }),
+        'segments': pd.DataFrame({
+            'customer_name': customers,
+            'cluster': labels,
+            'x': coords[:, 0],
+            'y': coords[:, 1],
+        }),
+        'lift': lift,
+        'attribute_shares': shares,
+        'attribute_means': means,
+        'explained_variance_ratio': variance,
+        'K': K,
+        'segment_model': segment_model,
+        'stages': recorder.records,
+    }
+    if compare:
+        results['comparison'] = comparison
+    if stability_runs:
+        results['stability'] = stability
+
+    if output_dir is not None:
+        with recorder.stage('write'):
+            os.makedirs(output_dir, exist_ok=True)
+            results['sweep'].to_csv(os.path.join(output_dir, 'sweep.csv'), index=False)
+            results['segments'].to_csv(os.path.join(output_dir, 'segments.csv'), index=False)
+            lift.to_csv(os.path.join(output_dir, 'lift.csv'))
+            results['segment_model'].save(os.path.join(output_dir, 'model.npz'))
+            shares.to_csv(os.path.join(output_dir, 'attribute_shares.csv'), index=False)
+            means.to_csv(os.path.join(output_dir, 'attribute_means.csv'))
+            if compare:
+                comparison.to_csv(os.path.join(output_dir, 'comparison.csv'))
+            if stability_runs:
+                stability.report.to_csv(os.path.join(output_dir, 'stability.csv'))
+        if figures:
+            with recorder.stage('figures'):
+                from . import plots
+                plots.save_figures(results, output_dir)
+
+    return results
@@ -0,0 +1,62 @@
+"""Figures for a pipeline run.
+
+Kept apart from ``segmentation.pipeline`` so that matplotlib and seaborn
+are only imported when figures are actually requested.
+"""
+import os
+
+
+def _pyplot():
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    sns.set_style("whitegrid")
+    sns.set_context("poster")
+    return plt
+
+
+def save_figures(results, output_dir):
+    """Write the elbow, silhouette, PCA scatter, explained-variance and lift
+    figures as PNGs."""
+    plt = _pyplot()
+    sweep = results['sweep']
+
+    fig, ax = plt.subplots(figsize=(12, 8))
+    ax.plot(sweep['K'], sweep['ss'])
+    ax.set_xlabel('K')
+    ax.set_ylabel('Sum of Squares')
+    fig.savefig(os.path.join(output_dir, 'K vs SS.png'), bbox_inches='tight')
+    plt.close(fig)
+
+    fig, ax = plt.subplots(figsize=(12, 8))
+    ax.plot(sweep['K'], sweep['silhouette'])
+    ax.set_xlabel('K')
+    ax.set_ylabel('Average Silhouette Score')
+    fig.savefig(os.path.join(output_dir, 'K vs Silhouette.png'), bbox_inches='tight')
+    plt.close(fig)
+
+    segments = results['segments']
+    fig, ax = plt.subplots(figsize=(12, 8))
+    ax.scatter(segments['x'], segments['y'], c=segments['cluster'], cmap='tab10')
+    ax.set_xlabel('x')
+    ax.set_ylabel('y')
+    fig.savefig(os.path.join(output_dir, 'PCA.png'), bbox_inches='tight')
+    plt.close(fig)
+
+    variance = results['explained_variance_ratio']
+    fig, ax = plt.subplots(figsize=(12, 8))
+    ax.plot(range(1, len(variance) + 1), variance)
+    ax.set_xlabel('Number of Components')
+    ax.set_ylabel('Proportion of Variance Explained')
+    fig.savefig(os.path.join(output_dir, 'Explained Variance.png'), bbox_inches='tight')
+    plt.close(fig)
+
+    lift = results['lift']
+    fig, axes = plt.subplots(len(lift), 1, figsize=(12, 4 * len(lift)), squeeze=False)
+    for ax, (cluster, row) in zip(axes[:, 0], lift.iterrows()):
+        ax.bar(range(len(row)), row.values, color='C%d' % (cluster % 10))
+        ax.set_title('Cluster %s' % cluster)
+    fig.savefig(os.path.join(output_dir, 'Lift.png'), bbox_inches='tight')
+    plt.close(fig)
@@ -0,0 +1,99 @@
+"""PCA projection and explained-variance curve without a full SVD.
+
+``project`` only ever computes the ``n_components`` that are asked for:
+
+* ``'randomized'`` (default) -- randomized truncated SVD (Halko et al.) of
+  the mean-centered matrix. Centering is applied implicitly inside the
+  matrix products, so sparse ``X`` is never densified.
+* ``'incremental'`` -- ``IncrementalPCA`` over row batches, for matrices
+  too large to factor in one go; only one dense batch exists at a time.
+* ``'full'`` -- ``sklearn.decomposition.PCA`` (ARPACK for sparse input).
+
+All methods return ``(coords, explained_variance_ratio)``, with the ratio
+taken against the total variance of ``X``.
+"""
+import numpy as np
+import scipy.linalg
+import scipy.sparse as sp
+import sklearn.decomposition
+from sklearn.utils.extmath import svd_flip
+
+METHODS = ('randomized', 'incremental', 'full')
+
+
+def total_variance(X):
+    """Sum of the column variances of ``X`` (ddof=1), sparse-aware."""
+    n = X.shape[0]
+    mean = np.asarray(X.mean(axis=0)).ravel()
+    sq = X.multiply(X) if sp.issparse(X) else X * X
+    sq_mean = np.asarray(sq.mean(axis=0)).ravel()
+    return float(((sq_mean - mean ** 2) * n / (n - 1)).sum())
+
+
+def randomized_pca(X, n_components=2, n_oversamples=10, n_iter=4, random_state=None):
+    """Randomized PCA of ``X`` with implicit centering.
+
+    Returns ``(coords, explained_variance, components)``.
+    """
+    n, d = X.shape
+    rng = np.random.default_rng(random_state)
+    mean = np.asarray(X.mean(axis=0)).ravel()
+    rank = min(n_components + n_oversamples, n, d)
+
+    def matmat(Q):
+        # (X - 1 mean^T) @ Q
+        return np.asarray(X @ Q) - np.outer(np.ones(n), mean @ Q)
+
+    def rmatmat(Q):
+        # (X - 1 mean^T)^T @ Q
+        return np.asarray(X.T @ Q) - np.outer(mean, Q.sum(axis=0))
+
+    Q, _ = scipy.linalg.qr(matmat(rng.standard_normal((d, rank))), mode='economic')
+    for _ in range(n_iter):
+        Z, _ = scipy.linalg.qr(rmatmat(Q), mode='economic')
+        Q, _ = scipy.linalg.qr(matmat(Z), mode='economic')
+
+    U, s, Vt = scipy.linalg.svd(rmatmat(Q).T, full_matrices=False)
+    U = Q @ U
+    U, Vt = svd_flip(U[:, :n_components], Vt[:n_components])
+    s = s[:n_components]
+    return U * s, s ** 2 / (n - 1), Vt
+
+
+def project(X, n_components=2, method='randomized', batch_size=None, random_state=None):
+    """Project ``X`` onto its first ``n_components`` principal components.
+
+    Returns ``(coords, explained_variance_ratio)``; both have only
+    ``n_components`` columns/entries.
+    """
+    n_components = min(n_components, *X.shape)
+    if method == 'randomized':
+        coords, variance, _ = randomized_pca(X, n_components, random_state=random_state)
+        return coords, variance / total_variance(X)
+    if method == 'incremental':
+        if batch_size is None:
+            batch_size = max(5 * n_components, 10000)
+        pca = sklearn.decomposition.IncrementalPCA(n_components=n_components,
+                                                   batch_size=batch_size)
+        pca.fit(X)
+        coords = np.vstack([pca.transform(_dense(X[i:i + batch_size]))
+                            for i in range(0, X.shape[0], batch_size)])
+        return coords, pca.explained_variance_ratio_
+    if method == 'full':
+        if sp.issparse(X):
+            n_components = min(n_components, min(X.shape) - 1)
+        solver = 'arpack' if sp.issparse(X) else 'auto'
+        pca = sklearn.decomposition.PCA(n_components=n_components, svd_solver=solver,
+                                        random_state=random_state)
+        coords = pca.fit_transform(X)
+        return coords, pca.explained_variance_ratio_
+    raise ValueError('unknown method %r, expected one of %s' % (method, METHODS))
+
+
+def explained_variance_curve(X, n_components=10, method='randomized', random_state=None):
+    """Explained-variance ratio of the first ``n_components`` components only."""
+    return project(X, n_components, method=method, random_state=random_state)[1]
+
+
+def _dense(X):
+    return X.toarray() if sp.issparse(X) else X
@@ -0,0 +1,135 @@
+"""Silhouette scoring across a whole K sweep.
+
+``sklearn.metrics.silhouette_score`` recomputes the full pairwise distance
+matrix for every K. Here the distances are produced once, in row chunks
+bounded by ``working_memory`` (MiB), and each chunk is multiplied once by
+a dense indicator matrix holding the clusters of every labeling in
+``assignments`` side by side, then discarded. Memory stays
+O(chunk x n + n x sum(K)) and both the distances and the per-cluster
+reduction are shared by all K.
+
+``approximate_silhouette`` scores only a stratified sample of customers
+(still against every customer) and reports the stratified-mean estimate
+with a normal confidence interval.
+"""
+from collections import namedtuple
+
+import numpy as np
+from scipy.stats import norm
+from sklearn.metrics import pairwise_distances_chunked
+
+SilhouetteEstimate = namedtuple('SilhouetteEstimate', ['score', 'low', 'high', 'sample_size'])
+
+
+def _codes(labels):
+    return np.unique(labels, return_inverse=True)[1].ravel()
+
+
+def _silhouette_rows(X, rows, assignments, metric, working_memory):
+    """Silhouette value of each row in ``rows`` under every labeling."""
+    keys = list(assignments)
+    encoded = [_codes(assignments[key]) for key in keys]
+    sizes = [np.bincount(codes) for codes in encoded]
+    offsets = np.concatenate([[0], np.cumsum([len(size) for size in sizes])])
+
+    # One dense n x (sum of K) indicator for all labelings, so each distance
+    # chunk is reduced against every K with a single GEMM.
+    onehot = np.zeros((X.shape[0], offsets[-1]))
+    for codes, offset in zip(encoded, offsets):
+        onehot[np.arange(len(codes)), offset + codes] = 1.0
+
+    def reduce_func(D, start):
+        return D @ onehot
+
+    sums = np.vstack(list(pairwise_distances_chunked(X[rows], X, reduce_func=reduce_func,
+                                                     metric=metric,
+                                                     working_memory=working_memory)))
+
+    out = {}
+    for key, codes, size, start, stop in zip(keys, encoded, sizes, offsets, offsets[1:]):
+        dist = sums[:, start:stop]
+        own = codes[rows]
+        idx = np.arange(len(rows))
+        own_size = size[own]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            a = dist[idx, own] / (own_size - 1)
+            means = dist / size
+        means[idx, own] = np.inf
+        b = means.min(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            s = (b - a) / np.maximum(a, b)
+        # Singleton clusters score 0, as in sklearn.
+        s[(own_size <= 1) | ~np.isfinite(s)] = 0.0
+        out[key] = s
+    return out
+
+
+def silhouette_samples_all(X, assignments, metric='euclidean', working_memory=None):
+    """Per-customer silhouette values for every labeling in ``assignments``.
+
+    ``assignments`` is the ``str(K) -> labels`` dict from ``sweep_k``; the
+    result has the same keys. Matches ``sklearn.metrics.silhouette_samples``.
+    """
+    return _silhouette_rows(X, np.arange(X.shape[0]), assignments, metric,
+                            working_memory)
+
+
+def silhouette_scores(X, assignments, metric='euclidean', working_memory=None):
+    """Mean silhouette for every labeling in ``assignments``."""
+    samples = silhouette_samples_all(X, assignments, metric, working_memory)
+    return {key: float(values.mean()) for key, values in samples.items()}
+
+
+def approximate_silhouette(X, assignments, sample_size=10000, strata=None,
+                           confidence=0.95, metric='euclidean',
+                           working_memory=None, random_state=None):
+    """Estimate the mean silhouette of every labeling from a stratified sample.
+
+    One sample of customers is drawn and shared by all K, so the distance
+    work is ``sample_size x n`` in total. Sampling is proportional within
+    ``strata`` (defaults to the labeling with the most clusters), with at
+    least two customers from every stratum that has them.
+
+    Returns
+    -------
+    dict
+        ``str(K)`` -> ``SilhouetteEstimate(score, low, high, sample_size)``.
+    """
+    n = X.shape[0]
+    if sample_size >= n:
+        exact = silhouette_scores(X, assignments, metric, working_memory)
+        return {key: SilhouetteEstimate(score, score, score, n)
+                for key, score in exact.items()}
+
+    if strata is None:
+        strata = max(assignments.values(), key=lambda labels: len(np.unique(labels)))
+    strata = np.unique(strata, return_inverse=True)[1].ravel()
+
+    rng = np.random.default_rng(random_state)
+    counts = np.bincount(strata)
+    take = np.minimum(counts, np.maximum(2, np.round(sample_size * counts / n).astype(int)))
+    rows = np.concatenate([
+        rng.choice(np.flatnonzero(strata == h), size=take[h], replace=False)
+        for h in range(len(counts))
+    ])
+    rows.sort()
+
+    values = _silhouette_rows(X, rows, assignments, metric, working_memory)
+    sample_strata = strata[rows]
+    weights = counts / n
+    z = norm.ppf(0.5 + confidence / 2)
+
+    out = {}
+    for key, s in values.items():
+        score = 0.0
+        var = 0.0
+        for h, (w, n_h, N_h) in enumerate(zip(weights, take, counts)):
+            s_h = s[sample_strata == h]
+            score += w * s_h.mean()
+            if n_h > 1:
+                var += w ** 2 * (1 - n_h / N_h) * s_h.var(ddof=1) / n_h
+        half = z * np.sqrt(var)
+        out[key] = SilhouetteEstimate(float(score), float(score - half),
+                                      float(score + half), len(rows))
+    return out
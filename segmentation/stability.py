@@ -0,0 +1,213 @@
+"""Stability of the K-Means segmentation across seeds and bootstrap samples.
+
+For every K, ``stability_analysis`` fits ``n_seeds`` models on the full data
+with different seeds and ``n_bootstrap`` models on bootstrap resamples,
+labels every customer with each of them, and builds consensus labels by
+majority vote over the aligned runs. Stability is the adjusted Rand index
+of every run against that consensus, which costs O(runs x n) per K rather
+than O(runs^2 x n) for all pairs.
+
+Bootstrap resamples are expressed as ``sample_weight`` counts over the
+original rows rather than as copies of ``X``. With ``n_jobs`` the fits run
+in a process pool; ``X`` is placed in shared memory once and every worker
+maps it without copying (sparse fits use ``copy_x=False``), each fit
+writes its labels straight into a shared result array, and the per-K
+consensus and ARI computations run in the same pool.
+"""
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import sklearn.cluster
+from scipy.optimize import linear_sum_assignment
+from sklearn.metrics import adjusted_rand_score
+
+StabilityResult = namedtuple('StabilityResult', ['report', 'consensus', 'agreement'])
+
+_worker_state = None
+
+
+def _share(array, blocks):
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    blocks.append(shm)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm.name, array.shape, array.dtype.str
+
+
+def _attach(spec, blocks):
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    blocks.append(shm)
+    return np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _share_matrix(X, blocks):
+    if sp.issparse(X):
+        X = X.tocsr()
+        return ('csr', X.shape, [_share(a, blocks) for a in (X.data, X.indices, X.indptr)])
+    return ('dense', X.shape, [_share(np.ascontiguousarray(X), blocks)])
+
+
+def _attach_matrix(spec, blocks):
+    kind, shape, arrays = spec
+    arrays = [_attach(a, blocks) for a in arrays]
+    if kind == 'csr':
+        return sp.csr_matrix(tuple(arrays), shape=shape, copy=False)
+    return arrays[0]
+
+
+def _init_worker(matrix_spec, array_specs):
+    global _worker_state
+    blocks = []
+    _worker_state = (_attach_matrix(matrix_spec, blocks),
+                     [_attach(spec, blocks) for spec in array_specs], blocks)
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=1)
+    except ImportError:
+        pass
+
+
+def _fit_worker(task):
+    X, (labels, _, _), _ = _worker_state
+    labels[task[0]] = _fit_predict(X, *task[1:])
+
+
+def _summarize_worker(i, K, runs_per_k):
+    _, (labels, consensus, agreement), _ = _worker_state
+    return _summarize(labels, consensus, agreement, i, K, runs_per_k)
+
+
+def _fit_predict(X, K, seed, bootstrap):
+    weights = None
+    if bootstrap:
+        n = X.shape[0]
+        weights = np.bincount(np.random.default_rng(seed).integers(0, n, n),
+                              minlength=n).astype(np.float64)
+    # Sparse X is never centered in place, so there is no need to copy the
+    # shared matrix; dense X is copied so workers never modify it.
+    model = sklearn.cluster.KMeans(n_clusters=K, random_state=seed, n_init=1,
+                                   copy_x=not sp.issparse(X))
+    model.fit(X, sample_weight=weights)
+    return model.predict(X)
+
+
+def _summarize(labels, consensus, agreement, i, K, runs_per_k):
+    """Consensus for the i-th K, written into row i of ``consensus`` and
+    ``agreement``; returns the ARI of every run against it."""
+    runs = labels[i * runs_per_k:(i + 1) * runs_per_k]
+    consensus[i], agreement[i] = consensus_labels(runs, K)
+    return np.array([adjusted_rand_score(consensus[i], run) for run in runs])
+
+
+def align_labels(labels, reference, K):
+    """Relabel ``labels`` to best match ``reference`` (Hungarian matching
+    on the contingency table)."""
+    contingency = np.bincount(labels.astype(np.int64) * K + reference,
+                              minlength=K * K).reshape(K, K)
+    rows, cols = linear_sum_assignment(-contingency)
+    mapping = np.empty(K, dtype=labels.dtype)
+    mapping[rows] = cols
+    return mapping[labels]
+
+
+def consensus_labels(runs, K):
+    """Majority vote over aligned runs.
+
+    Returns ``(labels, agreement)``, where ``agreement`` is the fraction of
+    runs that put each customer in its consensus cluster.
+    """
+    aligned = np.vstack([runs[0]] + [align_labels(r, runs[0], K) for r in runs[1:]])
+    votes = np.zeros((K, aligned.shape[1]), dtype=np.int32)
+    for row in aligned:
+        votes[row, np.arange(aligned.shape[1])] += 1
+    labels = votes.argmax(axis=0)
+    return labels, votes.max(axis=0) / len(aligned)
+
+
+def stability_analysis(X, Krange, n_seeds=10, n_bootstrap=10, n_jobs=None,
+                       random_state=None):
+    """Multi-seed and bootstrap stability of K-Means for each K.
+
+    Parameters
+    ----------
+    X : array or sparse matrix of shape (n_customers, n_offers)
+    Krange : iterable of int
+    n_seeds : int
+        Full-data fits per K, each with its own seed.
+    n_bootstrap : int
+        Fits per K on bootstrap resamples (as sample weights).
+    n_jobs : int, optional
+        Worker processes; ``None`` or 1 runs serially.
+    random_state : int, optional
+        Seeds every run, so the whole analysis is reproducible.
+
+    Returns
+    -------
+    StabilityResult
+        ``report`` is a frame indexed by K with the mean, std and min ARI
+        of the runs against the consensus labels and the mean consensus
+        agreement.
+        ``consensus`` and ``agreement`` map ``str(K)`` to the consensus
+        labels and per-customer agreement.
+    """
+    Krange = list(Krange)
+    runs_per_k = n_seeds + n_bootstrap
+    seeds = np.random.default_rng(random_state).integers(0, 2 ** 31 - 1,
+                                                         len(Krange) * runs_per_k)
+    tasks = []
+    for i, K in enumerate(Krange):
+        for j in range(runs_per_k):
+            row = i * runs_per_k + j
+            tasks.append((row, K, int(seeds[row]), j >= n_seeds))
+
+    aris, consensus, agreement = _run_tasks(X, tasks, Krange, runs_per_k, n_jobs)
+
+    report = []
+    for i, K in enumerate(Krange):
+        report.append({
+            'K': K,
+            'mean_ari': aris[i].mean(),
+            'std_ari': aris[i].std(),
+            'min_ari': aris[i].min(),
+            'mean_agreement': agreement[i].mean(),
+        })
+    return StabilityResult(pd.DataFrame(report).set_index('K'),
+                           {str(K): consensus[i] for i, K in enumerate(Krange)},
+                           {str(K): agreement[i] for i, K in enumerate(Krange)})
+
+
+def _run_tasks(X, tasks, Krange, runs_per_k, n_jobs):
+    n = X.shape[0]
+    shapes = [((len(tasks), n), np.int32), ((len(Krange), n), np.int32),
+              ((len(Krange), n), np.float64)]
+
+    if n_jobs is None or n_jobs == 1 or len(tasks) < 2:
+        labels, consensus, agreement = [np.empty(shape, dtype) for shape, dtype in shapes]
+        for row, K, seed, bootstrap in tasks:
+            labels[row] = _fit_predict(X, K, seed, bootstrap)
+        aris = [_summarize(labels, consensus, agreement, i, K, runs_per_k)
+                for i, K in enumerate(Krange)]
+        return aris, consensus, agreement
+
+    blocks = []
+    try:
+        matrix_spec = _share_matrix(X, blocks)
+        array_specs = [_share(np.empty(shape, dtype), blocks) for shape, dtype in shapes]
+        workers = None if n_jobs < 0 else n_jobs
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(matrix_spec, array_specs)) as pool:
+            list(pool.map(_fit_worker, tasks))
+            aris = list(pool.map(_summarize_worker, range(len(Krange)), Krange,
+                                 [runs_per_k] * len(Krange)))
+        _, consensus, agreement = [
+            np.ndarray(shape, dtype=dtype, buffer=shm.buf).copy()
+            for (shape, dtype), shm in zip(shapes, blocks[-3:])]
+        return aris, consensus, agreement
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
@@ -0,0 +1,184 @@
+"""Streaming / mini-batch segmentation over transaction feeds.
+
+``iter_transactions`` reads a transactions file in fixed-size chunks
+(CSV, Parquet or the Excel transactions sheet) without loading it whole.
+``StreamingSegmenter`` codes each chunk's customers and offers in bulk,
+appends the responses to growable int32 row/column buffers (8 bytes per
+response) and feeds only the rows the chunk touched to
+``MiniBatchKMeans.partial_fit``. Segmentation therefore runs in memory
+bounded by the response data itself and can be refreshed as new
+transactions arrive instead of re-fitting nightly.
+"""
+import os
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import sklearn.cluster
+
+from .ingest import TRANSACTION_COLUMNS
+
+
+def iter_transactions(path, chunksize=100000, sheet_name=1):
+    """Yield the transactions in ``path`` as DataFrames of ``chunksize`` rows.
+
+    The format is chosen from the extension (``.csv``, ``.parquet``/``.pq``,
+    ``.xlsx``). The first two columns are taken as customer name and offer
+    id, as in the WineKMC transactions sheet, and renamed to
+    ``customer_name`` / ``offer_id``.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        chunks = pd.read_csv(path, chunksize=chunksize)
+    elif ext in ('.parquet', '.pq'):
+        chunks = _iter_parquet(path, chunksize)
+    elif ext in ('.xlsx', '.xlsm'):
+        chunks = _iter_excel(path, chunksize, sheet_name)
+    else:
+        raise ValueError('unsupported transactions file: %s' % path)
+
+    for chunk in chunks:
+        chunk = chunk.iloc[:, :2]
+        chunk.columns = TRANSACTION_COLUMNS
+        yield chunk
+
+
+def _iter_parquet(path, chunksize):
+    import pyarrow.parquet as pq
+
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+        yield batch.to_pandas()
+
+
+def _iter_excel(path, chunksize, sheet_name):
+    import openpyxl
+
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[sheet_name] if isinstance(sheet_name, int) else wb[sheet_name]
+        rows = ws.iter_rows(min_row=2, values_only=True)
+        while True:
+            block = list(islice(rows, chunksize))
+            if not block:
+                break
+            yield pd.DataFrame([r[:2] for r in block])
+    finally:
+        wb.close()
+
+
+class StreamingSegmenter:
+    """Incrementally maintained feature rows + mini-batch K-Means.
+
+    Parameters
+    ----------
+    offer_ids : array-like
+        The offer columns. They must be fixed up front because the model's
+        feature width cannot grow; pass every offer in the offers sheet,
+        including ones that have no transactions yet. Transactions on
+        unknown offers are skipped and counted in ``n_skipped_``.
+    n_clusters : int
+    batch_size : int
+        Passed to ``MiniBatchKMeans``.
+    random_state : int, optional
+    """
+
+    def __init__(self, offer_ids, n_clusters, batch_size=1024, random_state=None):
+        self.offers = pd.Index(offer_ids, name='offer_id')
+        self.n_clusters = n_clusters
+        self.model = sklearn.cluster.MiniBatchKMeans(
+            n_clusters=n_clusters, batch_size=batch_size,
+            random_state=random_state, n_init='auto')
+        self.n_skipped_ = 0
+        self._customers = pd.Index([], dtype=object)
+        # Every (row, column) response seen so far, in arrival order, in
+        # buffers that grow by doubling; duplicates are dropped when rows are
+        # materialized.
+        self._rows = np.empty(1024, dtype=np.int32)
+        self._cols = np.empty(1024, dtype=np.int32)
+        self._n_responses = 0
+        self._pending = np.empty(0, dtype=np.intp)
+        self._fitted = False
+
+    @property
+    def customers(self):
+        return self._customers.rename('customer_name')
+
+    @property
+    def X(self):
+        """The full customer x offer matrix, built on demand."""
+        return self._rows_matrix(np.arange(len(self._customers)))
+
+    def update(self, chunk):
+        """Fold one transactions chunk into the rows and model.
+
+        Only the customers that appear in ``chunk`` are passed to
+        ``partial_fit``. Until the model has seen ``n_clusters`` customers
+        their rows are held back, since K-Means cannot initialize on fewer.
+        """
+        cols = self.offers.get_indexer(chunk['offer_id'])
+        known = cols >= 0
+        self.n_skipped_ += int((~known).sum())
+        names = chunk['customer_name'].to_numpy()[known]
+        cols = cols[known]
+        if len(cols) == 0:
+            return self
+
+        rows = self._customers.get_indexer(names)
+        new = rows < 0
+        if new.any():
+            codes, uniques = pd.factorize(names[new])
+            rows[new] = codes + len(self._customers)
+            self._customers = self._customers.append(pd.Index(uniques, dtype=object))
+        self._append(rows, cols)
+
+        touched = np.union1d(self._pending, rows)
+        if not self._fitted and len(touched) < self.n_clusters:
+            self._pending = touched
+            return self
+        self.model.partial_fit(self._rows_matrix(touched))
+        self._pending = np.empty(0, dtype=np.intp)
+        self._fitted = True
+        return self
+
+    def consume(self, chunks):
+        """Call ``update`` for every chunk of an iterable such as
+        ``iter_transactions(path)``."""
+        for chunk in chunks:
+            self.update(chunk)
+        return self
+
+    def labels(self):
+        """Current cluster of every customer seen so far, in ``customers`` order."""
+        return self.model.predict(self.X)
+
+    def _append(self, rows, cols):
+        end = self._n_responses + len(rows)
+        if end > len(self._rows):
+            capacity = max(end, 2 * len(self._rows))
+            self._rows = np.resize(self._rows, capacity)
+            self._cols = np.resize(self._cols, capacity)
+        self._rows[self._n_responses:end] = rows
+        self._cols[self._n_responses:end] = cols
+        self._n_responses = end
+
+    def _rows_matrix(self, rows):
+        """CSR matrix of just ``rows`` (sorted, unique row ids)."""
+        n_offers = len(self.offers)
+        all_rows = self._rows[:self._n_responses]
+        all_cols = self._cols[:self._n_responses]
+        if len(rows) < len(self._customers):
+            selected = np.zeros(len(self._customers), dtype=bool)
+            selected[rows] = True
+            keep = selected[all_rows]
+            all_rows = all_rows[keep]
+            all_cols = all_cols[keep]
+
+        # Sorting the combined keys dedups repeated responses and orders the
+        # entries by row, then column, as CSR expects.
+        keys = np.unique(all_rows.astype(np.int64) * n_offers + all_cols)
+        local = np.searchsorted(rows, keys // n_offers)
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(local, minlength=len(rows)), out=indptr[1:])
+        return sp.csr_matrix((np.ones(len(keys)), keys % n_offers, indptr),
+                             shape=(len(rows), n_offers))
@@ -0,0 +1,122 @@
+"""K sweep for the elbow curve.
+
+Fits ``KMeans`` for every K in a range and returns the sum-of-squares curve
+and cluster assignments in the same shape the case study builds by hand:
+``ss`` is a list aligned with ``Krange`` and ``assignments`` maps ``str(K)``
+to the label array. SS is read from the fitted model's ``inertia_`` rather
+than recomputed against a copy of ``X``.
+
+Independent fits are fanned out over a process pool. With ``warm_start``
+each K is instead seeded from the K-1 solution by splitting its largest
+cluster in two; that chain is sequential, but every step is a single Lloyd
+run from a good starting point.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import sklearn.cluster
+
+_worker_X = None
+
+
+def _init_worker(X):
+    # Ship X to each worker once instead of pickling it with every task, and
+    # keep KMeans' own OpenMP threads from oversubscribing the pool.
+    global _worker_X
+    _worker_X = X
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=1)
+    except ImportError:
+        pass
+
+
+def _fit_worker(K, random_state):
+    return _fit(_worker_X, K, random_state)
+
+
+def _fit(X, K, random_state, init='k-means++'):
+    n_init = 1 if not isinstance(init, str) else 'auto'
+    model = sklearn.cluster.KMeans(n_clusters=K, init=init, n_init=n_init,
+                                   random_state=random_state)
+    labels = model.fit_predict(X)
+    return labels, model.cluster_centers_, model.inertia_
+
+
+def split_largest(X, labels, centers, random_state=None):
+    """Return K+1 starting centers by splitting the largest cluster in two.
+
+    The largest cluster's points are bisected with a 2-means fit and its
+    center is replaced by the two child centers.
+    """
+    largest = np.bincount(labels, minlength=len(centers)).argmax()
+    members = X[labels == largest]
+    if members.shape[0] < 2:
+        return None
+    _, children, _ = _fit(members, 2, random_state)
+    return np.vstack([np.delete(centers, largest, axis=0), children])
+
+
+def sweep_k(X, Krange, n_jobs=None, warm_start=False, random_state=None,
+            return_centers=False):
+    """Fit KMeans for each K in ``Krange``.
+
+    Parameters
+    ----------
+    X : array or sparse matrix of shape (n_customers, n_offers)
+        Used as-is; sparse input is never densified.
+    Krange : iterable of int
+    n_jobs : int, optional
+        Worker processes for the independent fits. ``None`` or 1 fits
+        serially in this process. Ignored when ``warm_start`` is set.
+    warm_start : bool
+        Seed each K from the previous K's centers (split-the-largest).
+        Krange must then be increasing.
+    random_state : int, optional
+    return_centers : bool
+        Also return the fitted centers.
+
+    Returns
+    -------
+    ss : list of float
+        Sum of squares for each K, in ``Krange`` order.
+    assignments : dict
+        ``str(K)`` -> cluster label array.
+    centers : dict
+        ``str(K)`` -> cluster centers; only with ``return_centers``.
+    """
+    Krange = list(Krange)
+    if warm_start:
+        results = _sweep_warm(X, Krange, random_state)
+    elif n_jobs is not None and n_jobs != 1 and len(Krange) > 1:
+        workers = None if n_jobs < 0 else n_jobs
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(X,)) as pool:
+            results = list(pool.map(_fit_worker, Krange,
+                                    [random_state] * len(Krange)))
+    else:
+        results = [_fit(X, K, random_state) for K in Krange]
+
+    ss = [inertia for _, _, inertia in results]
+    assignments = {str(K): labels for K, (labels, _, _) in zip(Krange, results)}
+    if return_centers:
+        centers = {str(K): c for K, (_, c, _) in zip(Krange, results)}
+        return ss, assignments, centers
+    return ss, assignments
+
+
+def _sweep_warm(X, Krange, random_state):
+    if any(b <= a for a, b in zip(Krange, Krange[1:])):
+        raise ValueError('warm_start requires an increasing Krange')
+
+    results = []
+    previous = None
+    for K in Krange:
+        init = 'k-means++'
+        if previous is not None and previous[1].shape[0] == K - 1:
+            seeded = split_largest(X, previous[0], previous[1], random_state)
+            if seeded is not None:
+                init = seeded
+        previous = _fit(X, K, random_state, init=init)
+        results.append(previous)
+    return results
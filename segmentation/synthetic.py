@@ -0,0 +1,78 @@
+"""Synthetic WineKMC-shaped data for benchmarks.
+
+``make_offers_transactions`` produces frames with the same columns as the
+study's ``df_offers`` / ``df_transactions`` at any size. Customers are drawn
+from a few latent segments, each with its own offer preferences, so the
+data has cluster structure for K-Means to find.
+"""
+import numpy as np
+import pandas as pd
+
+from .ingest import OFFER_COLUMNS, TRANSACTION_COLUMNS
+
+CAMPAIGNS = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+             'August', 'September', 'October', 'November', 'December']
+VARIETALS = ['Malbec', 'Pinot Noir', 'Espumante', 'Champagne', 'Cabernet Sauvignon',
+             'Prosecco', 'Chardonnay', 'Merlot', 'Pinot Grigio']
+ORIGINS = ['France', 'Oregon', 'California', 'Australia', 'Chile', 'Germany',
+           'Italy', 'South Africa', 'New Zealand']
+
+
+def make_offers(n_offers=32, random_state=None):
+    """Offers frame with ``OFFER_COLUMNS`` and ids ``1..n_offers``."""
+    rng = np.random.default_rng(random_state)
+    df = pd.DataFrame({
+        'offer_id': np.arange(1, n_offers + 1),
+        'campaign': rng.choice(CAMPAIGNS, n_offers),
+        'varietal': rng.choice(VARIETALS, n_offers),
+        'min_qty': rng.choice([6, 12, 72, 144], n_offers),
+        'discount': rng.integers(10, 90, n_offers),
+        'origin': rng.choice(ORIGINS, n_offers),
+        'past_peak': rng.random(n_offers) < 0.3,
+    })
+    return df[OFFER_COLUMNS]
+
+
+def make_transactions(n_customers, n_offers=32, density=0.1, n_segments=5,
+                      random_state=None):
+    """Transactions frame with ``TRANSACTION_COLUMNS``.
+
+    Each customer responds to about ``density * n_offers`` offers (at least
+    one), drawn from their segment's Dirichlet preference vector. Repeated
+    (customer, offer) pairs are dropped, as in the real sheet.
+    """
+    rng = np.random.default_rng(random_state)
+    segment = rng.integers(0, n_segments, n_customers)
+    counts = np.maximum(1, rng.poisson(density * n_offers, n_customers))
+    counts = np.minimum(counts, n_offers)
+
+    customer = np.repeat(np.arange(n_customers), counts)
+    tx_segment = segment[customer]
+    offer = np.empty(len(customer), dtype=np.int64)
+
+    prefs = rng.dirichlet(np.full(n_offers, 0.3), n_segments).cumsum(axis=1)
+    for s in range(n_segments):
+        mask = tx_segment == s
+        draws = np.searchsorted(prefs[s], rng.random(mask.sum()) * prefs[s, -1])
+        offer[mask] = np.minimum(draws, n_offers - 1) + 1
+
+    width = len(str(n_customers))
+    names = np.char.add('Customer', np.char.zfill(np.arange(n_customers).astype(str), width))
+    df = pd.DataFrame({'customer_name': names[customer], 'offer_id': offer})
+    return df.drop_duplicates(ignore_index=True)[TRANSACTION_COLUMNS]
+
+
+def make_offers_transactions(n_customers, n_offers=32, density=0.1, n_segments=5,
+                             random_state=None):
+    """Return ``(df_offers, df_transactions)`` of the requested size."""
+    rng = np.random.default_rng(random_state)
+    seeds = rng.integers(0, 2 ** 31, 2)
+    return (make_offers(n_offers, seeds[0]),
+            make_transactions(n_customers, n_offers, density, n_segments, seeds[1]))
+
+
+def write_workbook(path, df_offers, df_transactions):
+    """Write the frames as a two-sheet workbook like WineKMC.xlsx."""
+    with pd.ExcelWriter(path) as writer:
+        df_offers.to_excel(writer, sheet_name='OfferInformation', index=False)
+        df_transactions.to_excel(writer, sheet_name='Transactions', index=False)
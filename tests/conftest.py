@@ -0,0 +1,22 @@
+import os
+
+import pytest
+
+from segmentation.features import build_offer_matrix
+from segmentation.ingest import read_workbook
+
+WORKBOOK = os.path.join(os.path.dirname(__file__), os.pardir, 'data', 'WineKMC.xlsx')
+
+
+@pytest.fixture(scope='session')
+def workbook():
+    return WORKBOOK
+
+
+@pytest.fixture(scope='session')
+def wine():
+    """``(df_offers, df_transactions, X, customers, offers)`` for WineKMC.xlsx."""
+    df_offers, df_transactions = read_workbook(WORKBOOK)
+    X, customers, offers = build_offer_matrix(df_transactions,
+                                              offer_ids=df_offers['offer_id'])
+    return df_offers, df_transactions, X, customers, offers
@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from segmentation import cache as cache_module
+from segmentation.cache import ResultCache, make_key, root_key
+from segmentation.pipeline import run
+
+
+def test_memoize_computes_once(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    calls = []
+
+    def square(x):
+        calls.append(x)
+        return x * x
+
+    assert cache.memoize('a', square, 3) == 9
+    assert cache.memoize('a', square, 3) == 9
+    assert calls == [3]
+    assert cache.get('missing') is None
+
+
+def test_keys_change_with_inputs(monkeypatch):
+    X = sp.random(20, 5, density=0.3, format='csr', random_state=0)
+    key = make_key('kmeans', X, 3, 0)
+
+    assert make_key('kmeans', X.copy(), 3, 0) == key
+    assert make_key('kmeans', X, 4, 0) != key
+    assert make_key('kmeans', X, 3, 1) != key
+    assert make_key('kmeans', X * 2, 3, 0) != key
+    assert make_key('kmeans', {'K': 3}) != make_key('kmeans', {'K': 4})
+
+    old = root_key('abc')
+    monkeypatch.setattr(cache_module, 'CACHE_VERSION', cache_module.CACHE_VERSION + 1)
+    assert root_key('abc') != old
+
+
+def test_evicts_least_recently_used(tmp_path):
+    value = np.zeros(1000)
+    cache = ResultCache(str(tmp_path))
+    for i, key in enumerate(['a', 'b', 'c']):
+        cache.put(key, value)
+        os.utime(cache._path(key), (i, i))
+    entry_size = os.path.getsize(cache._path('a'))
+
+    cache.get('a')  # 'a' is now the most recently used
+    cache.max_bytes = 2 * entry_size
+    cache.evict()
+
+    assert cache.get('b') is None
+    np.testing.assert_array_equal(cache.get('a'), value)
+    np.testing.assert_array_equal(cache.get('c'), value)
+
+
+def test_run_reuses_cached_stages(workbook, tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path / 'cache'))
+    first = run(workbook, Krange=[2, 3], cache_dir=None, random_state=0, result_cache=cache)
+    entries = sorted(os.listdir(cache.directory))
+
+    def fail(*args, **kwargs):
+        raise AssertionError('stage was recomputed')
+
+    monkeypatch.setattr('segmentation.pipeline.sweep_k', fail)
+    monkeypatch.setattr('segmentation.pipeline.approximate_silhouette', fail)
+    second = run(workbook, Krange=[2, 3], cache_dir=None, random_state=0, result_cache=cache)
+
+    assert sorted(os.listdir(cache.directory)) == entries
+    pd.testing.assert_frame_equal(first['sweep'], second['sweep'])
+    pd.testing.assert_frame_equal(first['segments'], second['segments'])
@@ -0,0 +1,26 @@
+import numpy as np
+from sklearn.neighbors import kneighbors_graph
+
+from segmentation.compare import ALGORITHMS, _kth_distance, compare_algorithms, neighbor_graph
+
+
+def test_kth_distance_of_symmetric_graph(wine):
+    X = wine[2]
+    knn = kneighbors_graph(X, n_neighbors=6, mode='distance')
+    graph = neighbor_graph(X, n_neighbors=6)
+
+    assert (graph != graph.T).nnz == 0
+    expected = np.sort(knn.data.reshape(X.shape[0], -1), axis=1)[:, 3]
+    np.testing.assert_array_equal(_kth_distance(graph, 4), expected)
+
+
+def test_compare_algorithms(wine):
+    X = wine[2]
+    report, labels = compare_algorithms(X, 4, random_state=0)
+
+    assert list(report.index) == ['knn_graph'] + list(ALGORITHMS)
+    assert report['peak_memory'].isna().all()
+    assert report.loc['KMeans', 'ari_vs_kmeans'] == 1
+    for name in ('KMeans', 'SpectralClustering', 'AgglomerativeClustering'):
+        assert report.loc[name, 'n_clusters'] == 4
+        assert len(labels[name]) == X.shape[0]
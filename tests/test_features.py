@@ -0,0 +1,16 @@
+import numpy as np
+import pandas as pd
+
+
+def test_offer_matrix_matches_merge_pivot_table(wine):
+    df_offers, df_transactions, X, customers, offers = wine
+
+    df_transactions = df_transactions.assign(n=1)
+    merged_df = pd.merge(df_offers, df_transactions)
+    pivoted_df = merged_df.pivot_table(index='customer_name', columns='offer_id',
+                                       values='n', fill_value=0)
+
+    assert X.format == 'csr'
+    assert list(customers) == list(pivoted_df.index)
+    assert list(offers) == list(pivoted_df.columns)
+    np.testing.assert_array_equal(X.toarray(), pivoted_df.values)
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from segmentation.instrument import JsonLinesSink, StageRecorder
+
+
+def test_stage_records(tmp_path):
+    path = str(tmp_path / 'stages.jsonl')
+    recorder = StageRecorder(sinks=[JsonLinesSink(path)])
+    with recorder.stage('big', X=np.zeros((3, 4))):
+        big = np.ones(100 * 2 ** 20 // 8)
+        big[::512] = 2
+        del big
+    with recorder.stage('small'):
+        pass
+
+    first, second = recorder.records
+    assert first['inputs'] == {'X': [3, 4]}
+    assert first['wall_time'] >= 0 and first['cpu_time'] >= 0
+    assert len(open(path).readlines()) == 2
+    assert 'small' in recorder.summary()
+
+    if first['peak_rss_scope'] != 'stage':
+        pytest.skip('per-stage peak RSS is only available on Linux')
+    # The second stage's peak is not inflated by the first stage's 100 MiB.
+    assert first['rss_growth'] > 50 * 2 ** 20
+    assert second['rss_growth'] < 50 * 2 ** 20
+    assert second['peak_rss'] < first['peak_rss']
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from segmentation.lift import attribute_means, attribute_shares, lift_matrix, offer_lift
+
+
+def _labels(n, K=4):
+    return np.random.RandomState(0).randint(K, size=n)
+
+
+def test_lift_matches_per_cluster_loop(wine):
+    df_offers, df_transactions, X, _, offers = wine
+    labels = _labels(X.shape[0])
+    merged_df = pd.merge(df_offers, df_transactions.assign(n=1))
+    pivoted = merged_df.pivot_table(index='customer_name', columns='offer_id',
+                                    values='n', fill_value=0)
+
+    overall = pivoted.sum() / len(pivoted)
+    expected = pd.DataFrame([pivoted[labels == i].sum() / (labels == i).sum() - overall
+                             for i in range(4)])
+    lift = lift_matrix(X, labels, offers)
+    np.testing.assert_allclose(lift.to_numpy(), expected.to_numpy())
+
+    tidy = offer_lift(X, labels, offers)
+    np.testing.assert_allclose(tidy['lift'].to_numpy(), lift.to_numpy().ravel())
+
+
+def test_attribute_profiles_match_merge(wine):
+    df_offers, df_transactions, X, customers, offers = wine
+    labels = _labels(X.shape[0])
+    merged = (df_transactions
+              .merge(pd.DataFrame({'customer_name': customers, 'cluster': labels}))
+              .merge(df_offers, on='offer_id'))
+
+    shares = attribute_shares(X, labels, df_offers, offers)
+    varietal = shares[shares['attribute'] == 'varietal'].set_index(['cluster', 'value'])
+    expected = merged.groupby('cluster')['varietal'].value_counts(normalize=True)
+    np.testing.assert_allclose(varietal['share'].reindex(expected.index), expected)
+
+    means = attribute_means(X, labels, df_offers, offers)
+    expected = merged.groupby('cluster')[['discount', 'min_qty']].mean()
+    np.testing.assert_allclose(means.loc[expected.index].to_numpy(), expected.to_numpy())
@@ -0,0 +1,22 @@
+import numpy as np
+import sklearn.cluster
+
+from segmentation.model import SegmentModel
+
+
+def test_segment_model_round_trip(wine, tmp_path):
+    _, df_transactions, X, customers, offers = wine
+    model = sklearn.cluster.KMeans(n_clusters=3, random_state=0).fit(X)
+    segment_model = SegmentModel.from_estimator(model, offers)
+
+    path = str(tmp_path / 'model.npz')
+    segment_model.save(path)
+    loaded = SegmentModel.load(path)
+
+    assert loaded.K == 3
+    assert list(loaded.offer_ids) == list(offers)
+    np.testing.assert_array_equal(loaded.centers, model.cluster_centers_)
+    np.testing.assert_array_equal(loaded.predict(X), model.predict(X))
+
+    scored = loaded.score_transactions(df_transactions)
+    np.testing.assert_array_equal(scored.reindex(customers).values, model.labels_)
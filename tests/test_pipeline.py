@@ -0,0 +1,42 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from segmentation.__main__ import main
+from segmentation.model import SegmentModel
+from segmentation.pipeline import run
+from segmentation.sweep import sweep_k
+
+OUTPUTS = ('sweep.csv', 'segments.csv', 'lift.csv', 'model.npz',
+           'attribute_shares.csv', 'attribute_means.csv')
+
+
+def test_run_writes_results(workbook, wine, tmp_path):
+    _, _, X, customers, _ = wine
+    results = run(workbook, Krange=[2, 3, 4], output_dir=str(tmp_path), cache_dir=None,
+                  random_state=0)
+
+    for name in OUTPUTS:
+        assert os.path.exists(tmp_path / name)
+    assert results['K'] in (2, 3, 4)
+    assert [record['stage'] for record in results['stages']][:2] == ['load', 'pivot']
+
+    segments = pd.read_csv(tmp_path / 'segments.csv')
+    assert list(segments['customer_name']) == list(customers)
+
+    # The final KMeans segmentation is the sweep's fit for the chosen K.
+    _, assignments = sweep_k(X, [results['K']], random_state=0)
+    np.testing.assert_array_equal(segments['cluster'], assignments[str(results['K'])])
+    model = SegmentModel.load(str(tmp_path / 'model.npz'))
+    np.testing.assert_array_equal(model.predict(X), segments['cluster'])
+
+
+def test_cli(workbook, tmp_path, capsys):
+    output_dir = str(tmp_path / 'out')
+    assert main([workbook, '--k-range', '2-3', '-k', '3', '--algorithm', 'minibatch',
+                 '-o', output_dir, '--no-cache', '--random-state', '0']) == 0
+
+    assert 'K = 3' in capsys.readouterr().out
+    assert pd.read_csv(os.path.join(output_dir, 'segments.csv'))['cluster'].nunique() <= 3
+    assert SegmentModel.load(os.path.join(output_dir, 'model.npz')).K == 3
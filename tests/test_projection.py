@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+import sklearn.decomposition
+
+from segmentation.projection import METHODS, explained_variance_curve, project, total_variance
+
+
+def _align(coords, reference):
+    # Components are only defined up to sign.
+    return coords * np.sign((coords * reference).sum(axis=0))
+
+
+# The randomized range finder is approximate, mostly in the trailing components.
+TOLERANCE = {'randomized': 0.05, 'incremental': 1e-6, 'full': 1e-6}
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_project_agrees_with_pca(wine, method):
+    X = wine[2]
+    pca = sklearn.decomposition.PCA(n_components=3, svd_solver='full')
+    expected = pca.fit_transform(X.toarray())
+
+    coords, ratio = project(X, 3, method=method, random_state=0)
+
+    assert coords.shape == (X.shape[0], 3)
+    np.testing.assert_allclose(ratio, pca.explained_variance_ratio_, atol=1e-3)
+    np.testing.assert_allclose(_align(coords, expected), expected, atol=TOLERANCE[method])
+
+
+def test_explained_variance_curve(wine):
+    X = wine[2]
+    pca = sklearn.decomposition.PCA(svd_solver='full').fit(X.toarray())
+
+    assert total_variance(X) == pytest.approx(pca.explained_variance_.sum())
+    np.testing.assert_allclose(explained_variance_curve(X, 10, random_state=0),
+                               pca.explained_variance_ratio_[:10], atol=1e-3)
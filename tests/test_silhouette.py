@@ -0,0 +1,18 @@
+import numpy as np
+import sklearn.metrics
+
+from segmentation.silhouette import silhouette_samples_all
+from segmentation.sweep import sweep_k
+
+
+def test_silhouette_samples_all_matches_sklearn(wine):
+    X = wine[2]
+    _, assignments = sweep_k(X, range(2, 6), random_state=0)
+
+    # A tiny working_memory forces several distance chunks.
+    samples = silhouette_samples_all(X, assignments, working_memory=0.001)
+
+    assert set(samples) == set(assignments)
+    for key, labels in assignments.items():
+        np.testing.assert_allclose(samples[key],
+                                   sklearn.metrics.silhouette_samples(X, labels))
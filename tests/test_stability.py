@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from segmentation.stability import align_labels, consensus_labels, stability_analysis
+
+
+def test_align_and_consensus():
+    reference = np.array([0, 0, 1, 1, 2, 2])
+    permuted = np.array([2, 2, 0, 0, 1, 1])
+    np.testing.assert_array_equal(align_labels(permuted, reference, 3), reference)
+
+    noisy = np.array([0, 0, 1, 1, 2, 1])
+    labels, agreement = consensus_labels([reference, permuted, noisy], 3)
+    np.testing.assert_array_equal(labels, reference)
+    np.testing.assert_allclose(agreement, [1, 1, 1, 1, 1, 2 / 3])
+
+
+def test_pooled_matches_serial(wine):
+    X = wine[2]
+    serial = stability_analysis(X, [2, 3], n_seeds=3, n_bootstrap=3, random_state=0)
+    pooled = stability_analysis(X, [2, 3], n_seeds=3, n_bootstrap=3, n_jobs=2,
+                                random_state=0)
+
+    pd.testing.assert_frame_equal(serial.report, pooled.report)
+    for K in ('2', '3'):
+        np.testing.assert_array_equal(serial.consensus[K], pooled.consensus[K])
+        np.testing.assert_array_equal(serial.agreement[K], pooled.agreement[K])
+    assert (serial.report['min_ari'] <= serial.report['mean_ari']).all()
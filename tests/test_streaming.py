@@ -0,0 +1,33 @@
+import numpy as np
+
+from segmentation.features import build_offer_matrix
+from segmentation.streaming import StreamingSegmenter, iter_transactions
+
+
+def test_streaming_rows_match_build_offer_matrix(wine, workbook):
+    df_offers, df_transactions, X, customers, offers = wine
+
+    segmenter = StreamingSegmenter(offers, n_clusters=3, random_state=0)
+    segmenter.consume(iter_transactions(workbook, chunksize=50))
+    # A repeated chunk must not change the 0/1 rows.
+    segmenter.update(df_transactions.head(20))
+
+    order = segmenter.customers.get_indexer(customers)
+    assert (order >= 0).all()
+    streamed = segmenter.X[order]
+    assert (streamed != X).nnz == 0
+    assert segmenter.n_skipped_ == 0
+    assert segmenter.labels().shape == (len(customers),)
+
+
+def test_streaming_skips_unknown_offers(wine):
+    df_offers, df_transactions, _, _, offers = wine
+
+    segmenter = StreamingSegmenter(offers[:16], n_clusters=3, random_state=0)
+    segmenter.update(df_transactions)
+
+    expected, _, _ = build_offer_matrix(df_transactions, offer_ids=offers[:16])
+    assert segmenter.n_skipped_ == int((~df_transactions['offer_id'].isin(offers[:16])).sum())
+    assert segmenter.X.nnz == expected.nnz
+    np.testing.assert_array_equal(np.asarray(segmenter.X.sum(axis=0)).ravel(),
+                                  np.asarray(expected.sum(axis=0)).ravel())